@@ -0,0 +1,116 @@
+"""Synthetic fleet-scale data generator.
+
+Writes engine, weather, altitude, cabin, passenger and crew files with
+the same fields and value ranges as data/, at any size. Records are
+streamed to disk, so multi-million record files never sit in memory.
+
+    python benchmarks/generate_data.py OUT_DIR --records 1000000 --flights 10000
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator
+import argparse
+import json
+import random
+
+AIRPORTS = ["BLR", "DEL", "HYD", "MAA", "BOM", "COK"]
+CARRIERS = ["AI", "IN", "SG", "UK"]
+START = datetime(2025, 12, 10)
+DAY = timedelta(days=1)
+
+# Record counts per file, from the telemetry size and fleet size
+def plan(records: int, flights: int, crew: int = None) -> Dict[str, int]:
+    return {
+        "engine_logs.json": records,
+        "altitude_logs.json": records,
+        "cabin_pressure_logs.json": records,
+        "weather_logs.json": max(flights, records // 10),
+        "passenger_load.json": flights * 7,  # a week of booking history per flight
+        "crew.json": crew if crew is not None else flights * 4,
+    }
+
+def _flight(i: int) -> str:
+    return f"{CARRIERS[i % len(CARRIERS)]}{100 + i}"
+
+def _aircraft(i: int) -> str:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return "VT-" + letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26]
+
+def _telemetry(kind: str, n: int, flights: int, rng: random.Random) -> Iterator[dict]:
+    """n records spread over one day in time order, each on a random flight."""
+    step = DAY / max(n, 1)
+    for i in range(n):
+        f = rng.randrange(flights)
+        r = {"flight_id": _flight(f), "aircraft_id": _aircraft(f), "timestamp": (START + step * i).isoformat(timespec="seconds")}
+        if kind == "engine_logs.json":
+            expected = 100.0
+            r.update(engine_thrust=round(expected - abs(rng.gauss(0, 6)), 1), expected_thrust=expected,
+                     vibration=round(abs(rng.gauss(2.5, 1.2)), 1), fuel_burn=rng.randint(2300, 2750))
+        elif kind == "altitude_logs.json":
+            r.update(altitude=rng.randint(800, 12000), turbulence=round(rng.uniform(0, 6), 1))
+        elif kind == "cabin_pressure_logs.json":
+            r.update(cabin_pressure=rng.randint(7400, 8300), cabin_temperature=rng.randint(20, 33),
+                     cabin_altitude=rng.randint(6000, 8200), pressure_rate_change=rng.randint(200, 520))
+        else:  # weather
+            del r["aircraft_id"]
+            r.update(airport=rng.choice(AIRPORTS), crosswind=rng.randint(0, 55),
+                     thunderstorm=rng.random() < 0.03, visibility=rng.choice([800, 1200, 2000, 5000, 8000]))
+        yield r
+
+def _passengers(n: int, flights: int, rng: random.Random) -> Iterator[dict]:
+    for i in range(n):
+        f, day = i % flights, i // flights
+        capacity = rng.choice([150, 180, 220])
+        booked = rng.randint(capacity // 2, capacity + 10)
+        yield {"flight_id": _flight(f), "timestamp": (START - DAY * (6 - day % 7)).isoformat(timespec="seconds"),
+               "capacity": capacity, "booked": booked, "checked_in": max(0, booked - rng.randint(0, 20))}
+
+def _crew(n: int, rng: random.Random) -> Iterator[dict]:
+    for i in range(n):
+        role = "pilot" if rng.random() < 0.6 else "cabin"
+        yield {"crew_id": f"{role.upper()}{i}", "name": f"Crew {i}", "role": role,
+               "last_rest_end": (START - timedelta(hours=rng.uniform(0, 36))).isoformat(timespec="seconds"),
+               "assigned_flight": None}
+
+def _write(path: Path, records: Iterator[dict], ndjson: bool) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        if ndjson:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+            return
+        f.write("[")
+        for i, r in enumerate(records):
+            f.write(("\n  " if i == 0 else ",\n  ") + json.dumps(r))
+        f.write("\n]\n")
+
+def generate(out_dir: Path, records: int = 1000, flights: int = 10, crew: int = None,
+             seed: int = 7, ndjson: bool = False) -> Dict[str, int]:
+    """Write every data file into out_dir and return the record count per file."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng, counts = random.Random(seed), plan(records, flights, crew)
+    for fn, n in counts.items():
+        if fn == "passenger_load.json":
+            rows = _passengers(n, flights, rng)
+        elif fn == "crew.json":
+            rows = _crew(n, rng)
+        else:
+            rows = _telemetry(fn, n, flights, rng)
+        _write(out_dir / fn, rows, ndjson and fn != "crew.json")  # crew.json is always read whole
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic AO&PFMAS data files.")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--records", type=int, default=1000, help="records per telemetry log (1k-10M)")
+    parser.add_argument("--flights", type=int, default=10, help="distinct flights (10-50k)")
+    parser.add_argument("--crew", type=int, default=None, help="roster size (default: 4 per flight)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ndjson", action="store_true", help="write newline-delimited JSON instead of arrays")
+    args = parser.parse_args(argv)
+    counts = generate(args.out_dir, args.records, args.flights, args.crew, args.seed, args.ndjson)
+    for fn, n in counts.items():
+        print(f"{fn}: {n} records")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Benchmark harness for the pipeline stages.
+
+Generates (or reuses) a synthetic data set, points the modules at it via
+the AOPFMAS_* environment variables, and times every stage: wall and CPU
+seconds, peak traced memory and a digest of its output. Results are
+saved as JSON; --compare fails when a stage got slower or used more peak
+memory than its tolerance, or its output digest changed. Stages faster
+than --min-wall seconds are too noisy to time and only have their memory
+and output checked.
+
+    python benchmarks/run_benchmarks.py --records 100000 --flights 1000 --out bench.json
+    python benchmarks/run_benchmarks.py --records 100000 --flights 1000 --compare bench.json
+"""
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from generate_data import generate
+
+def _digest(obj) -> str:
+    return hashlib.blake2b(repr(obj).encode(), digest_size=8).hexdigest()
+
+def _stages() -> List[Tuple[str, Callable[[Dict], object]]]:
+    """(name, fn(ctx)) in run order; imported late so the env overrides apply."""
+    from modules import log_processor as lp
+    from modules.delay_predictor import predict_delay_for_flight, predict_delays
+    from modules.health_monitor import monitor_health
+    from modules.crew_optimizer import CrewPool, clear_crew_assignments, load_crew
+    from modules.load_predictor import LoadForecaster
+    from modules.routing import RoutingTable
+    import main
+
+    def load_store(ctx):
+        lp.clear_cache()
+        if ctx["ndjson"]:  # load_json only reads arrays; NDJSON goes through iter_json
+            ctx["store"] = lp.TelemetryStore({k: list(lp.iter_json(fn)) for k, fn in lp.LOG_FILES.items()})
+        else:
+            ctx["store"] = lp.TelemetryStore.load()
+        return {k: len(ctx["store"].all(k)) for k in lp.LOG_FILES}
+
+    def health(ctx):
+        s = ctx["store"]
+        return monitor_health(s.all("engine"), s.all("altitude"), s.all("cabin"), ctx["cfg"])
+
+    def delay_per_flight(ctx):
+        s = ctx["store"]
+        return {f: predict_delay_for_flight(f, s.for_flight("engine", f), s.for_flight("weather", f),
+                                            s.for_flight("altitude", f), ctx["cfg"], s.for_flight("cabin", f))
+                for f in s.flights()}
+
+    def delay_stream(ctx):
+        it = lp.iter_json
+        return predict_delays(ctx["cfg"], it("engine_logs.json"), it("weather_logs.json"),
+                              it("altitude_logs.json"), it("cabin_pressure_logs.json"))
+
+    def load_forecast(ctx):
+        s = ctx["store"]
+        return LoadForecaster.from_records(s.all("passenger")).predict_many(s.flights())
+
+    def routing(ctx):
+        s = ctx["store"]
+        table = RoutingTable.from_logs(ctx["cfg"], s.all("weather"), s.all("passenger"))
+        table.observe_weather(s.all("weather"))
+        return table.diversions(s.all("weather")), table.popular_routes()
+
+    def crew(ctx):
+        clear_crew_assignments()
+        pool = CrewPool(load_crew(), ctx["cfg"])
+        return [pool.assign(f)[1] for f in ctx["store"].flights()]
+
+    def pipeline(ctx):
+        clear_crew_assignments()
+        with redirect_stdout(io.StringIO()):
+            main.run(stream=ctx["ndjson"])
+        return None  # the report carries today's date, so its digest is not comparable
+
+    stages = [
+        ("get_all_flights", lambda ctx: lp.get_all_flights()),
+        ("load_store", load_store),
+        ("monitor_health", health),
+        ("predict_delay_per_flight", delay_per_flight),
+        ("predict_delays_stream", delay_stream),
+    ]
+    try:
+        from modules.binary_cache import convert, load_log
+        from modules.columnar import Frame, monitor_health_columnar, predict_delays_columnar
+
+        def columnar(ctx, cached=False):
+            s, vocab = ctx["store"], {}
+            frames = [Frame(load_log(lp.LOG_FILES[k]) if cached and k != "weather" else s.all(k), vocab)
+                      for k in ("engine", "weather", "altitude", "cabin")]
+            return monitor_health_columnar(frames[0], frames[2], frames[3], ctx["cfg"]), \
+                predict_delays_columnar(ctx["cfg"], *frames)
+
+        def cache_build(ctx):
+            for k in ("engine", "altitude", "cabin"):
+                convert(lp.DATA_DIR / lp.LOG_FILES[k])
+        stages += [("columnar", columnar), ("binary_cache_build", cache_build),
+                   ("columnar_cached", lambda ctx: columnar(ctx, cached=True))]
+    except ImportError:  # numpy not installed
+        pass
+    stages += [("load_forecast", load_forecast), ("routing", routing), ("crew_assign", crew), ("main_run", pipeline)]
+    return stages
+
+def run_stages(memory: bool = True, ndjson: bool = False) -> Dict[str, Dict]:
+    from modules.health_monitor import load_config
+    ctx, results = {"cfg": load_config(), "ndjson": ndjson}, {}
+    for name, fn in _stages():
+        if memory:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        out = fn(ctx)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        tracemalloc.stop()
+        results[name] = {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4),
+                         "peak_mb": round(peak / 2**20, 2) if peak is not None else None,
+                         "digest": _digest(out) if out is not None else None}
+    return results
+
+def compare(current: Dict, baseline: Dict, tolerance: float, memory_tolerance: float = 1.25,
+            min_wall: float = 0.05, min_mb: float = 1.0) -> List[str]:
+    """Stages that slowed down or grew their peak memory beyond tolerance, or changed output.
+
+    Wall ratios are skipped when both runs took under min_wall seconds and
+    memory ratios when both peaks are under min_mb.
+    """
+    problems = []
+    for name, now in current["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        flags = []
+        ratio = now["wall_s"] / before["wall_s"] if before["wall_s"] else 1.0
+        if max(now["wall_s"], before["wall_s"]) < min_wall:
+            ratio = None
+        elif ratio > tolerance:
+            flags.append("SLOWER")
+            problems.append(f"{name}: {ratio:.2f}x slower")
+        mem = None
+        if now["peak_mb"] is not None and before.get("peak_mb") is not None and max(now["peak_mb"], before["peak_mb"]) >= min_mb:
+            mem = now["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("inf")
+            if mem > memory_tolerance:
+                flags.append("MORE MEMORY")
+                problems.append(f"{name}: peak memory {before['peak_mb']:.2f} MB -> {now['peak_mb']:.2f} MB")
+        if now["digest"] != before["digest"] and current["data"] == baseline["data"]:
+            flags.append("OUTPUT CHANGED")
+            problems.append(f"{name}: output changed")
+        wall = f"{ratio:5.2f}x" if ratio is not None else "noise"
+        memory = f"{mem:5.2f}x mem" if mem is not None else ""
+        print(f"{name:26} {before['wall_s']:9.4f}s -> {now['wall_s']:9.4f}s  {wall:>6}  {memory:>9}  {' '.join(flags)}")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each AO&PFMAS pipeline stage.")
+    parser.add_argument("--data", type=Path, help="existing data directory (default: generate one)")
+    parser.add_argument("--records", type=int, default=10000, help="records per telemetry log")
+    parser.add_argument("--flights", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ndjson", action="store_true", help="data is NDJSON instead of JSON arrays; main_run uses --stream")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows pure-Python stages)")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE", help="results JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown ratio (default 1.25)")
+    parser.add_argument("--memory-tolerance", type=float, default=1.25,
+                        help="allowed peak memory growth ratio (default 1.25)")
+    parser.add_argument("--min-wall", type=float, default=0.05,
+                        help="don't compare times of stages faster than this many seconds (default 0.05)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="aopfmas-bench-") as tmp:
+        tmp = Path(tmp)
+        data = args.data or tmp / "data"
+        if args.data is None:
+            generate(data, args.records, args.flights, seed=args.seed, ndjson=args.ndjson)
+        os.environ["AOPFMAS_DATA_DIR"] = str(data)
+        os.environ["AOPFMAS_LOGS_DIR"] = str(tmp / "logs")
+        os.environ["AOPFMAS_REPORTS_DIR"] = str(tmp / "reports")
+        os.environ["AOPFMAS_CACHE_DIR"] = str(tmp / "cache")
+        stages = run_stages(memory=not args.no_memory, ndjson=args.ndjson)
+
+    current = {"data": str(args.data) if args.data else {"records": args.records, "flights": args.flights,
+                                                         "seed": args.seed, "ndjson": args.ndjson},
+               "python": sys.version.split()[0], "stages": stages}
+    try:
+        import resource
+        current["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:  # not available on Windows
+        pass
+    if args.out:
+        args.out.write_text(json.dumps(current, indent=2), encoding="utf-8")
+
+    if args.compare:
+        problems = compare(current, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance,
+                           args.memory_tolerance, args.min_wall)
+        for p in problems:
+            print("REGRESSION:", p)
+        sys.exit(1 if problems else 0)
+    for name, s in stages.items():
+        mem = f"{s['peak_mb']:8.2f} MB" if s["peak_mb"] is not None else ""
+        print(f"{name:26} wall {s['wall_s']:9.4f}s  cpu {s['cpu_s']:9.4f}s  {mem}")
+
+if __name__ == "__main__":
+    main()
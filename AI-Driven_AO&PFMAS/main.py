@@ -12,66 +12,204 @@ Description:
 """
 from pathlib import Path
 from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
 
 BASE = Path(__file__).resolve().parents[0]
-from modules.log_processor import load_json, get_all_flights
-from modules.delay_predictor import predict_delay_for_flight
-from modules.crew_optimizer import load_crew, assign_crew, suggest_alternate_crews
-from modules.load_predictor import predict_load
-from modules.health_monitor import monitor_health, load_config
+from modules.log_processor import LOG_FILES, TelemetryStore, iter_json
+from modules.delay_predictor import predict_delay_for_flight, predict_delays
+from modules.crew_optimizer import load_crew, CrewPool, solve_crew_batch, apply_crew_batch, compare_with_greedy
+from modules.load_predictor import LoadForecaster
+from modules.health_monitor import monitor_health, monitor_health_stream, load_config
 from modules.dashboard import render_dashboard
-from modules.reporter import write_report, generate_report_text
+from modules.reporter import write_report, iter_report_lines
+from modules.incremental import ResultCache
+from modules.metrics import Metrics
+from modules.routing import ROUTE_FIELDS, RoutingTable, needs_diversion, weather_risk
+
+PROFILE_DIR = Path(__file__).resolve().parent / "output" / "profiles"
+
+def _flight_result(f, delay, reasons, risky_weather, loads, lp=None):
+    lp = lp or loads.predict(f)
+    return {"flight": f, "delay": delay, "reasons": reasons, "load_pred": lp,
+            "load_factor": loads.load_factor(f, lp["expected"]) if lp["expected"] is not None else None,
+            "weather_risks": [f"{f}: {w}" for w in risky_weather]}
+
+def _forecaster(passenger_logs, cfg):
+    return LoadForecaster.from_records(passenger_logs, cfg.get("load_ewma_alpha", 0.3))
+
+# Stateless per-flight stages: delay, load and weather risk
+def evaluate_flight(f, store, cfg, loads=None):
+    loads = loads or _forecaster(store.for_flight("passenger", f), cfg)
+    weather = store.for_flight("weather", f)
+    delay, reasons = predict_delay_for_flight(f, store.for_flight("engine", f), weather,
+                                              store.for_flight("altitude", f), cfg, store.for_flight("cabin", f))
+    return _flight_result(f, delay, reasons, [w for w in weather if weather_risk(w, cfg)], loads)
+
+# Worker entry point: evaluates a shard of flights from just their records
+def _evaluate_shard(flights, logs, cfg):
+    store = TelemetryStore(logs)
+    loads = _forecaster(store.all("passenger"), cfg)
+    return [evaluate_flight(f, store, cfg, loads) for f in flights]
+
+# Shards flights across a process pool; results come back in flight order
+def _evaluate_parallel(store, cfg, workers, flights):
+    size = max(1, -(-len(flights) // (workers * 4)))  # a few shards per worker evens out skew
+    shards = [flights[i:i + size] for i in range(0, len(flights), size)]
+    logs = [{kind: [r for f in shard for r in store.for_flight(kind, f)] for kind in LOG_FILES} for shard in shards]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(_evaluate_shard, shards, logs, [cfg] * len(shards))
+        return [r for part in parts for r in part]
+
+# Yields records unchanged after handing each one to every sink
+def _tapped(records, *sinks):
+    for r in records:
+        for sink in sinks:
+            sink(r)
+        yield r
+
+# Same stages as evaluate_flight, but every log is read through iter_json
+# so telemetry is never held in memory as a whole. Health alerts are written
+# as they fire; the delay pass also collects flight ids, route legs and
+# weather for the later stages, so weather and bookings are read once.
+def _stream_stages(cfg, metrics):
+    with metrics.stage("health") as st:
+        critical_alerts = monitor_health_stream(iter_json("engine_logs.json"), iter_json("altitude_logs.json"),
+                                                iter_json("cabin_pressure_logs.json"), cfg)
+        st.count(len(critical_alerts))
+    with metrics.stage("evaluate") as st:
+        flights, legs, risky, diverting, latest = set(), [], {}, [], RoutingTable({})
+        def flight(r):
+            if "flight_id" in r:
+                flights.add(r["flight_id"])
+        def leg(r):
+            if r.get("airport") or (r.get("origin") and r.get("destination")):
+                legs.append({k: r[k] for k in ROUTE_FIELDS if k in r})
+        def weather(w):
+            if weather_risk(w, cfg):
+                risky.setdefault(w.get("flight_id"), []).append(w)
+            if needs_diversion(w, cfg):
+                diverting.append(w)
+            latest.observe_weather((w,))
+        delays = predict_delays(cfg, _tapped(iter_json("engine_logs.json"), flight),
+                                _tapped(iter_json("weather_logs.json"), flight, leg, weather),
+                                _tapped(iter_json("altitude_logs.json"), flight), iter_json("cabin_pressure_logs.json"))
+        loads = _forecaster(_tapped(iter_json("passenger_load.json"), flight, leg), cfg)
+        flights = sorted(flights)
+        results = [_flight_result(f, *delays.get(f, (0, [])), risky.get(f, []), loads, lp)
+                   for f, lp in zip(flights, loads.predict_many(flights))]
+        st.count(len(results))
+    with metrics.stage("routing"):
+        routing = RoutingTable.from_logs(cfg, legs)
+        routing.observe_weather(latest.weather.values())
+        route_diversions = routing.diversions(diverting)
+    return critical_alerts, routing, route_diversions, results
+
+# Vectorized rule evaluation over NumPy columns; needs numpy installed.
+# Telemetry is memory-mapped from the binary cache; weather and bookings are
+# also loaded as dicts for weather risks, loads and routing.
+def _columnar_stages(store, cfg, metrics):
+    from modules.binary_cache import load_log
+    from modules.columnar import Frame, monitor_health_columnar, predict_delays_columnar
+    vocab = {}
+    with metrics.stage("columns") as st:
+        # Cached logs only: columns built from dicts are slower than the dict path
+        engine, weather, altitude, cabin = (Frame(load_log(LOG_FILES[k]) or [], vocab)
+                                            for k in ("engine", "weather", "altitude", "cabin"))
+        st.count(engine.n + weather.n + altitude.n + cabin.n)
+    with metrics.stage("health") as st:
+        critical_alerts = monitor_health_columnar(engine, altitude, cabin, cfg)
+        st.count(len(critical_alerts))
+    with metrics.stage("evaluate") as st:
+        delays = predict_delays_columnar(cfg, engine, weather, altitude, cabin)
+        loads = _forecaster(store.all("passenger"), cfg)
+        flights = sorted(engine.flight_ids() | altitude.flight_ids() | set(store.flights()))
+        results = []
+        for f, lp in zip(flights, loads.predict_many(flights)):
+            risky = [w for w in store.for_flight("weather", f) if weather_risk(w, cfg)]
+            results.append(_flight_result(f, *delays.get(f, (0, [])), risky, loads, lp))
+        st.count(len(results))
+    return critical_alerts, results
 
 # Coordinates loading, prediction, dashboard, and report
-def run():
-    engine_logs = load_json("engine_logs.json")
-    weather_logs = load_json("weather_logs.json")
-    altitude_logs = load_json("altitude_logs.json")
-    passenger_logs = load_json("passenger_load.json")
-    crew_list = load_crew()
-    cfg = load_config()
-    flights = get_all_flights()
+def run(stream=False, columnar=False, workers=1, incremental=False, batch_crew=False, metrics=None):
+    metrics = metrics or Metrics(enabled=False)
+    with metrics.stage("load") as st:
+        crew_list = load_crew()
+        cfg = load_config()
+        if stream:
+            store = None
+        elif columnar:  # telemetry is read from the binary cache instead
+            store = TelemetryStore.load({k: LOG_FILES[k] for k in ("weather", "passenger")})
+        else:
+            store = TelemetryStore.load()  # one pass over every log, indexed per flight
+        if store:
+            st.count(sum(len(store.all(k)) for k in LOG_FILES))
+    if stream:
+        critical_alerts, routing, route_diversions, results = _stream_stages(cfg, metrics)
+    elif columnar:
+        critical_alerts, results = _columnar_stages(store, cfg, metrics)
+    else:
+        with metrics.stage("health") as st:
+            critical_alerts = monitor_health(store.all("engine"), store.all("altitude"), store.all("cabin"), cfg)
+            st.count(len(critical_alerts))
+        def evaluate(flights):
+            if workers > 1:
+                return _evaluate_parallel(store, cfg, workers, flights)
+            loads = _forecaster(store.all("passenger"), cfg)  # one pass over booking history
+            return [evaluate_flight(f, store, cfg, loads) for f in flights]
+        with metrics.stage("evaluate") as st:
+            if incremental:
+                cache = ResultCache()
+                results, stale = cache.evaluate(store, cfg, evaluate)
+                cache.save()
+                print(f"Incremental run: re-evaluated {len(stale)} of {len(results)} flights")
+                st.count(len(stale))
+            else:
+                results = evaluate(store.flights())
+                st.count(len(results))
+    if not stream:
+        with metrics.stage("routing") as st:
+            routing = RoutingTable.from_logs(cfg, store.all("weather"), store.all("passenger"))
+            routing.observe_weather(store.all("weather"))
+            route_diversions = routing.diversions(store.all("weather"))
+            st.count(len(store.all("weather")))
     predicted_delays = []
-    critical_alerts = monitor_health(engine_logs, altitude_logs)
     crew_shortages = []
     load_factors = []
-    popular_routes = {}
+    popular_routes = routing.popular_routes()
     weather_risks = []
-    # Build diversions using config-provided alternates
-    route_diversions = []
-    for log in weather_logs:
-        if log.get("thunderstorm") or log.get("visibility", 5000) < cfg.get("visibility_threshold_m", 1500):
-            dest = log.get("destination", "DEL")
-            alternates = cfg.get("alternate_airports", {}).get(dest, [])
-            route_diversions.append({
-                "flight_id": log.get("flight_id"),
-                "issue": "Bad weather on route",
-                "suggested_alternates": alternates,
-                "extra_time_min": 30 + (10 * len(alternates))
-            })
-    details = []
-
-    for f in flights:
-        delay, reasons = predict_delay_for_flight(f, engine_logs, weather_logs, altitude_logs, cfg)
-        if delay > 0:
-            predicted_delays.append({"flight": f, "delay": delay, "reasons": reasons})
-        assigned, shortage = assign_crew(f, crew_list, cfg)
-        if shortage:
-            crew_shortages.append(f)
-            alt = suggest_alternate_crews(crew_list, needed=3)
-            details.append(f"Crew shortage for {f}. Suggestions: {alt}")
-        history = [p for p in passenger_logs if p.get("flight_id") == f]
-        lp = predict_load(f, history)
-        if lp.get("expected") is not None and history:
-            lf = lp["expected"] / (history[-1].get("capacity") or 1)
-            load_factors.append(lf)
-        for w in weather_logs:
-            if w.get("flight_id") == f and (w.get("crosswind",0) > cfg.get("crosswind_threshold_knots",40) or w.get("thunderstorm") or w.get("visibility",999999) < cfg.get("visibility_threshold_m",1500)):
-                weather_risks.append(f"{f}: {w}")
-        details.append(f"Flight {f} -> Delay: {delay} reasons: {reasons} load_pred: {lp}")
+    batch_shortages = None
+    with metrics.stage("crew") as st:
+        if batch_crew:  # staff the whole day at once, before the per-flight loop
+            flights = [r["flight"] for r in results]
+            batch = solve_crew_batch(flights, crew_list, cfg)
+            stats = compare_with_greedy(flights, crew_list, cfg, batch=batch)
+            apply_crew_batch(batch)
+            batch_shortages = set(batch["shortages"])
+            print(f"Batch crew assignment: {stats['batch_shortages']} shortages "
+                  f"({stats['shortages_removed']} fewer than flight-by-flight)")
+        else:
+            crew_pool = CrewPool(crew_list, cfg)
+
+        for r in results:
+            f, delay, reasons = r["flight"], r["delay"], r["reasons"]
+            if delay > 0:
+                predicted_delays.append({"flight": f, "delay": delay, "reasons": reasons})
+            if batch_shortages is None:
+                assigned, shortage = crew_pool.assign(f)
+            else:
+                shortage = f in batch_shortages
+            if shortage:
+                crew_shortages.append(f)
+            if r["load_factor"] is not None:
+                load_factors.append(r["load_factor"])
+            weather_risks.extend(r["weather_risks"])
+        st.count(len(results))
     
     summary = {
-        "total_flights": len(flights),
+        "total_flights": len(results),
         "predicted_delays": predicted_delays,
         "critical_alerts": critical_alerts,
         "crew_shortages": crew_shortages,
@@ -80,10 +218,66 @@ def run():
         "weather_risks": weather_risks,
         "route_diversions": route_diversions
     }
-    render_dashboard(summary)
-    report_text = generate_report_text(summary, details)
-    fname = write_report(date.today().isoformat(), report_text)
+    with metrics.stage("dashboard"):
+        render_dashboard(summary)
+    with metrics.stage("report"):
+        fname = write_report(date.today().isoformat(), iter_report_lines(summary), cfg)  # streamed section by section
     print(f"Report written to: {fname}")
 
+# Daemon mode: live alerting instead of a one-shot report
+def serve(port=None, dashboard_interval=30.0, from_start=False):
+    from modules.service import MonitoringService
+    service = MonitoringService(load_config(), dashboard_interval=dashboard_interval, from_start=from_start)
+    try:
+        asyncio.run(service.serve(port=port))
+    except KeyboardInterrupt:
+        print(f"Stopped after {service.records} records, {service.alerts} alerts")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AO&PFMAS daily operations pipeline.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true",
+                      help="read logs incrementally (JSON arrays or NDJSON) instead of loading them whole; "
+                           "records must be time-ordered per flight")
+    mode.add_argument("--columnar", action="store_true",
+                      help="evaluate health and delay rules as vectorized NumPy masks")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="evaluate delay, load and weather risk per flight on N processes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-evaluate only flights whose telemetry or config changed since the last run")
+    parser.add_argument("--batch-crew", action="store_true",
+                        help="assign crew for all flights at once instead of greedily in flight order")
+    parser.add_argument("--metrics", type=Path, metavar="PATH",
+                        help="write per-stage timings and counters to PATH (Prometheus text if it ends in .prom, else JSON)")
+    parser.add_argument("--profile", action="append", default=[], metavar="STAGE",
+                        help="run STAGE under cProfile (repeatable; 'all' for every stage)")
+    parser.add_argument("--profile-dir", type=Path, default=PROFILE_DIR, metavar="DIR",
+                        help="where --profile writes <stage>.prof files (default: output/profiles)")
+    daemon = parser.add_argument_group("daemon mode")
+    daemon.add_argument("--daemon", action="store_true",
+                        help="keep running: tail data/ logs and append health alerts as they fire")
+    daemon.add_argument("--listen", type=int, metavar="PORT",
+                        help="also accept NDJSON records on 127.0.0.1:PORT")
+    daemon.add_argument("--dashboard-interval", type=float, default=30.0, metavar="SECONDS")
+    daemon.add_argument("--from-start", action="store_true",
+                        help="process records already in the logs instead of only new ones")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if (args.workers > 1 or args.incremental) and (args.stream or args.columnar):
+        parser.error("--workers and --incremental apply to the default indexed mode only")
+    return args
+
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    args = parse_args()
+    if args.daemon:
+        serve(args.listen, args.dashboard_interval, args.from_start)
+    else:
+        metrics = Metrics(enabled=bool(args.metrics or args.profile), profile=args.profile, profile_dir=args.profile_dir)
+        run(stream=args.stream, columnar=args.columnar, workers=args.workers, incremental=args.incremental,
+            batch_crew=args.batch_crew, metrics=metrics)
+        if args.metrics:
+            metrics.write(args.metrics)
+            print(f"Metrics written to: {args.metrics}")
+        if args.profile:
+            print(f"Profiles written to: {args.profile_dir}")
\ No newline at end of file
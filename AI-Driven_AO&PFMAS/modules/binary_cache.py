@@ -0,0 +1,262 @@
+"""Binary columnar cache for the data/ logs; needs numpy.
+
+Each log is converted once into a directory of .npy files: the key
+layout of every record, and per field a type tag plus typed value
+arrays (int64, float64, or int32 codes into a per-field string table,
+which is how flight_id, aircraft_id and timestamps are stored). Later
+runs memory-map those arrays instead of parsing JSON, and a log is
+rebuilt automatically when its source file's mtime or size changes.
+
+Records rebuilt by CachedLog compare equal to the parsed JSON, key order
+and int/float/bool types included, so alert and report text is unchanged.
+
+    python -m modules.binary_cache          # convert every log in DATA_DIR
+"""
+from pathlib import Path
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from modules.log_processor import BASE, DATA_DIR, LOG_FILES, iter_json
+
+CACHE_DIR = Path(os.environ.get("AOPFMAS_CACHE_DIR", BASE / "output" / "cache"))
+VERSION = 1
+
+# Value tags; ABSENT marks rows whose record lacks the field
+ABSENT, NONE, BOOL, INT, FLOAT, STR, OTHER = range(7)
+KINDS = ["absent", "none", "bool", "int", "float", "str", "other"]
+DTYPES = {"int": np.int64, "float": np.float64, "str": np.int32}
+
+def _tag(v) -> int:
+    if v is None:
+        return NONE
+    if isinstance(v, bool):
+        return BOOL
+    if isinstance(v, int):
+        return INT if -2**63 <= v < 2**63 else OTHER
+    if isinstance(v, float):
+        return FLOAT
+    return STR if isinstance(v, str) else OTHER
+
+def cache_path(source: Path) -> Path:
+    """Cache directory for a source file, unique per absolute path."""
+    digest = hashlib.blake2b(str(source.resolve()).encode(), digest_size=4).hexdigest()
+    return CACHE_DIR / f"{source.stem}-{digest}"
+
+def _stamp(source: Path) -> List[int]:
+    st = source.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+_MISSING = object()
+CHUNK = 1 << 16  # records converted per batch; bounds memory on multi-GB logs
+
+class _Column:
+    """Typed arrays for one field, built one chunk of records at a time."""
+
+    def __init__(self, n: int):
+        self.chunks: List[Tuple[np.ndarray, Dict[str, np.ndarray]]] = []
+        self.table: Dict[str, int] = {}
+        if n:
+            self.chunks.append((np.zeros(n, np.uint8), {}))  # earlier records lacked the field
+
+    def add(self, values: list) -> None:
+        n, types = len(values), set(map(type, values))
+        try:
+            if types == {float}:
+                self.chunks.append((np.full(n, FLOAT, np.uint8), {"float": np.array(values, np.float64)}))
+                return
+            if types == {int}:
+                self.chunks.append((np.full(n, INT, np.uint8), {"int": np.array(values, np.int64)}))
+                return
+        except OverflowError:  # ints beyond int64 are stored as JSON text
+            pass
+        if types == {str}:
+            table = self.table
+            codes = np.fromiter((table.setdefault(v, len(table)) for v in values), np.int32, n)
+            self.chunks.append((np.full(n, STR, np.uint8), {"str": codes}))
+            return
+        tags, ints, floats, codes = (np.zeros(n, t) for t in (np.uint8, np.int64, np.float64, np.int32))
+        for i, v in enumerate(values):
+            tag = ABSENT if v is _MISSING else _tag(v)
+            tags[i] = tag
+            if tag in (BOOL, INT):
+                ints[i] = v
+            elif tag == FLOAT:
+                floats[i] = v
+            elif tag in (STR, OTHER):
+                codes[i] = self.table.setdefault(v if tag == STR else json.dumps(v), len(self.table))
+        parts = {}
+        for part, values, used_by in (("int", ints, (BOOL, INT)), ("float", floats, (FLOAT,)), ("str", codes, (STR, OTHER))):
+            if np.isin(tags, used_by).any():
+                parts[part] = values
+        self.chunks.append((tags, parts))
+
+    def save(self, path: Path, i: int) -> List[str]:
+        """Write this field's arrays as <i>.<part>.npy; return the value kinds seen."""
+        tags = np.concatenate([t for t, _ in self.chunks]) if self.chunks else np.zeros(0, np.uint8)
+        np.save(path / f"{i}.tag.npy", tags)
+        for part, dtype in DTYPES.items():
+            if any(part in parts for _, parts in self.chunks):
+                np.save(path / f"{i}.{part}.npy",
+                        np.concatenate([parts.get(part, np.zeros(len(t), dtype)) for t, parts in self.chunks]))
+        if self.table:
+            np.save(path / f"{i}.table.npy", np.array(list(self.table), dtype=str))
+        return sorted({KINDS[t] for t in np.unique(tags).tolist()} - {"absent"})
+
+def convert(source: Path, dest: Optional[Path] = None) -> Path:
+    """Write the columnar cache for a JSON array or NDJSON file; return its directory."""
+    dest = dest or cache_path(source)
+    stamp = _stamp(source)  # taken before reading, so a concurrent write triggers a rebuild
+    layouts: Dict[tuple, int] = {}
+    layout_chunks: List[np.ndarray] = []
+    fields: Dict[str, _Column] = {}
+    n = 0
+    records = iter_json(source)
+    while chunk := list(islice(records, CHUNK)):
+        layout_chunks.append(np.fromiter((layouts.setdefault(tuple(r), len(layouts)) for r in chunk), np.int32, len(chunk)))
+        for k in dict.fromkeys(k for r in chunk for k in r):
+            if k not in fields:
+                fields[k] = _Column(n)
+        for k, col in fields.items():
+            col.add([r.get(k, _MISSING) for r in chunk])
+        n += len(chunk)
+
+    tmp = dest.with_name(f"{dest.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "layout.npy", np.concatenate(layout_chunks) if layout_chunks else np.zeros(0, np.int32))
+    meta = {"version": VERSION, "source": str(source), "stamp": stamp, "n": n,
+            "layouts": [list(k) for k in layouts],
+            "fields": [{"name": name, "kinds": col.save(tmp, i)} for i, (name, col) in enumerate(fields.items())]}
+    with (tmp / "meta.json").open("w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    shutil.rmtree(dest, ignore_errors=True)
+    tmp.replace(dest)
+    return dest
+
+class CachedLog:
+    """Memory-mapped columns of one converted log.
+
+    Behaves as a read-only sequence of record dicts (rows are rebuilt on
+    access; take() rebuilds many at once), and exposes the typed arrays
+    for vectorized readers such as columnar.Frame.
+    """
+
+    def __init__(self, path: Path):
+        with (path / "meta.json").open(encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path, self.meta, self.n = path, meta, meta["n"]
+        self.layouts = [tuple(k) for k in meta["layouts"]]
+        self.layout = self._load(path / "layout.npy")
+        self.kinds = {fd["name"]: set(fd["kinds"]) for fd in meta["fields"]}
+        self._index = {fd["name"]: i for i, fd in enumerate(meta["fields"])}
+        self._arrays = {}
+
+    @staticmethod
+    def _load(path: Path) -> np.ndarray:
+        return np.load(path, mmap_mode="r").view(np.ndarray)  # still file-backed, minus memmap's per-item overhead
+
+    def array(self, field: str, part: str) -> Optional[np.ndarray]:
+        """One stored array of a field: tag, int, float, str (codes) or table; None if not stored."""
+        key = (field, part)
+        if key not in self._arrays:
+            path = self.path / f"{self._index[field]}.{part}.npy" if field in self._index else None
+            self._arrays[key] = self._load(path) if path and path.exists() else None
+        return self._arrays[key]
+
+    def _values(self, field: str, idx: np.ndarray) -> list:
+        """Python values of a field at rows idx (placeholders where the field is absent)."""
+        kinds = self.kinds[field]
+        ints, floats, codes, table = (self.array(field, p) for p in ("int", "float", "str", "table"))
+        if kinds == {"int"}:
+            return ints[idx].tolist()
+        if kinds == {"float"}:
+            return floats[idx].tolist()
+        if kinds == {"str"}:
+            return table[codes[idx]].tolist()
+        tags = self.array(field, "tag")[idx].tolist()
+        ints = ints[idx].tolist() if ints is not None else None
+        floats = floats[idx].tolist() if floats is not None else None
+        texts = table[codes[idx]].tolist() if table is not None else None
+        out = []
+        for j, t in enumerate(tags):
+            if t == INT:
+                out.append(ints[j])
+            elif t == FLOAT:
+                out.append(floats[j])
+            elif t == STR:
+                out.append(texts[j])
+            elif t == BOOL:
+                out.append(bool(ints[j]))
+            elif t == OTHER:
+                out.append(json.loads(texts[j]))
+            else:
+                out.append(None)
+        return out
+
+    def take(self, idx, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        """Records at the given row indices, rebuilt column by column.
+
+        With fields, records only carry those of the fields they have.
+        """
+        idx = np.asarray(idx, dtype=np.intp)
+        wanted = self._index if fields is None else [f for f in dict.fromkeys(fields) if f in self._index]
+        columns = {field: self._values(field, idx) for field in wanted}
+        layout = self.layout[idx]
+        if len(self.layouts) == 1 or not len(idx) or (layout == layout[0]).all():  # the usual case: one field layout
+            keys = [k for k in self.layouts[int(layout[0])] if k in columns] if len(idx) else ()
+            return [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))] if keys else [{} for _ in idx]
+        out = [None] * len(idx)
+        for lay in np.unique(layout).tolist():
+            keys, at = [k for k in self.layouts[lay] if k in columns], np.flatnonzero(layout == lay)
+            values = zip(*([columns[k][j] for j in at.tolist()] for k in keys)) if keys else ([] for _ in at)
+            for j, row in zip(at.tolist(), values):
+                out[j] = dict(zip(keys, row))
+        return out
+
+    def row(self, i: int) -> dict:
+        return self.take([i])[0]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> dict:
+        if not -self.n <= i < self.n:
+            raise IndexError(i)
+        return self.row(i % self.n)
+
+    def __iter__(self) -> Iterator[dict]:
+        for start in range(0, self.n, CHUNK):
+            yield from self.take(np.arange(start, min(start + CHUNK, self.n)))
+
+def open_log(source: Path) -> Optional[CachedLog]:
+    """Memory-map the cache for source, converting it first if missing or stale.
+
+    Returns None if the source file does not exist.
+    """
+    if not source.exists():
+        return None
+    dest = cache_path(source)
+    try:
+        with (dest / "meta.json").open(encoding="utf-8") as f:
+            meta = json.load(f)
+        fresh = meta.get("version") == VERSION and meta.get("stamp") == _stamp(source)
+    except (FileNotFoundError, json.JSONDecodeError):
+        fresh = False
+    if not fresh:
+        convert(source, dest)
+    return CachedLog(dest)
+
+def load_log(filename: str) -> Optional[CachedLog]:
+    """open_log for a file in DATA_DIR."""
+    return open_log(DATA_DIR / filename)
+
+if __name__ == "__main__":
+    for fn in LOG_FILES.values():
+        log = load_log(fn)
+        if log is not None:
+            size = sum(p.stat().st_size for p in log.path.iterdir())
+            print(f"{fn}: {log.n} records, {size} bytes in {log.path}")
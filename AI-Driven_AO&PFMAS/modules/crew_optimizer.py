@@ -1,12 +1,11 @@
 """Crew optimizer with double-booking prevention and rest rules."""
-from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import bisect
+import heapq
 import json
+from modules.log_processor import DATA_DIR
 
-# Prevent double-booking
-BASE = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE / "data"
 crew_assignments: Dict[str, str] = {}
 
 def load_crew() -> List[Dict]:
@@ -15,14 +14,19 @@ def load_crew() -> List[Dict]:
     except FileNotFoundError:
         return []
 
-def _rest_ok(c: Dict, hours: int) -> bool:
+ALWAYS_RESTED = datetime.min.replace(tzinfo=timezone.utc)
+
+def _rest_end(c: Dict) -> Optional[datetime]:
+    """Parsed last_rest_end (UTC if naive), or None if missing/unparseable."""
     try:
         last_rest_end = datetime.fromisoformat(c.get("last_rest_end"))
-        if last_rest_end.tzinfo is None:
-            last_rest_end = last_rest_end.replace(tzinfo=timezone.utc)
-        rested = datetime.now(timezone.utc) - last_rest_end
     except Exception:
-        rested = timedelta.max
+        return None
+    return last_rest_end.replace(tzinfo=timezone.utc) if last_rest_end.tzinfo is None else last_rest_end
+
+def _rest_ok(c: Dict, hours: int) -> bool:
+    last_rest_end = _rest_end(c)
+    rested = timedelta.max if last_rest_end is None else datetime.now(timezone.utc) - last_rest_end
     return rested >= timedelta(hours=hours)
 
 # Check double-booking and rest
@@ -81,4 +85,252 @@ def validate_crew_assignment(flight: str, crew_list: List[Dict]) -> Dict:
         "assigned_crew": [{"crew_id": c.get("crew_id"), "name": c.get("name"), "role": c.get("role")} for c in assigned],
         "double_booking_found": bool(issues),
         "issues": issues,
-    }
\ No newline at end of file
+    }
+
+class CrewPool:
+    """Indexed roster for assign/unassign/suggest in O(log n) per crew member.
+
+    Keeps, per role, a heap of free rested crew (by roster position) and a
+    heap of free crew still resting (by the time they become eligible), so
+    picks match assign_crew's roster-order scan. The pool owns assignment
+    state for its roster: use it instead of assign_crew/unassign_crew.
+    """
+
+    def __init__(self, crew_list: List[Dict], cfg: Dict, assignments: Dict[str, str] = None):
+        self.crew = crew_list
+        self.assignments = crew_assignments if assignments is None else assignments
+        self.req = {"pilot": cfg.get("required_pilots", 2), "cabin": cfg.get("required_cabin_crew", 1)}
+        rest = timedelta(hours=cfg.get("crew_rest_hours", 12))
+        self.eligible_at: List[datetime] = []
+        self.free: Dict[str, List[int]] = {}
+        self.resting: Dict[str, List[Tuple[datetime, int]]] = {}
+        self.by_flight: Dict[str, Dict[str, List[int]]] = {}  # flight -> role -> sorted roster positions
+        self.unbooked = []  # roster positions not in assignments (lazy deletion)
+        for i, c in enumerate(crew_list):
+            end = _rest_end(c)
+            self.eligible_at.append(ALWAYS_RESTED if end is None else end + rest)
+            flight = self.assignments.get(c.get("crew_id")) or c.get("assigned_flight")
+            if flight is None:
+                self._release(i)
+            else:
+                bisect.insort(self.by_flight.setdefault(flight, {}).setdefault(self._role(i), []), i)
+                if c.get("crew_id") not in self.assignments:
+                    self.unbooked.append(i)
+        heapq.heapify(self.unbooked)
+
+    def _role(self, i: int) -> str:
+        return self.crew[i].get("role", "").lower()
+
+    def _release(self, i: int) -> None:
+        role = self._role(i)
+        heapq.heappush(self.resting.setdefault(role, []), (self.eligible_at[i], i))
+        heapq.heappush(self.unbooked, i)
+
+    def _promote(self, role: str, now: datetime) -> None:
+        resting, free = self.resting.get(role, []), self.free.setdefault(role, [])
+        while resting and resting[0][0] <= now:
+            heapq.heappush(free, heapq.heappop(resting)[1])
+
+    def assign(self, flight: str, now: datetime = None) -> Tuple[List[Dict], bool]:
+        """Same result as assign_crew(flight, crew_list, cfg)."""
+        now = now or datetime.now(timezone.utc)
+        assigned: List[Dict] = []
+        shortage = False
+        for role, needed in self.req.items():
+            self._promote(role, now)
+            free, booked = self.free[role], self.by_flight.setdefault(flight, {}).setdefault(role, [])
+            pinned = [i for i in booked if self.eligible_at[i] <= now]
+            taken, p = [], 0
+            while len(taken) < needed and (p < len(pinned) or free):
+                if p < len(pinned) and (not free or pinned[p] < free[0]):
+                    taken.append(pinned[p])
+                    p += 1
+                    continue
+                i = heapq.heappop(free)
+                bisect.insort(booked, i)
+                taken.append(i)
+            for i in sorted(taken):
+                c = self.crew[i]
+                self.assignments[c.get("crew_id")] = flight
+                c["assigned_flight"] = flight
+                assigned.append(c)
+            shortage = shortage or len(taken) < needed
+        return assigned, shortage
+
+    def unassign(self, flight: str) -> None:
+        """Release every crew member booked on flight (e.g. on cancellation)."""
+        for positions in self.by_flight.pop(flight, {}).values():
+            for i in positions:
+                c = self.crew[i]
+                self.assignments.pop(c.get("crew_id"), None)
+                c["assigned_flight"] = None
+                self._release(i)
+
+    def suggest_alternates(self, needed: int = 3) -> List[List[Dict]]:
+        """Same result as suggest_alternate_crews(crew_list, needed)."""
+        found, seen = [], set()
+        while self.unbooked and len(found) < 2 * needed:
+            i = heapq.heappop(self.unbooked)
+            if i not in seen and self.crew[i].get("crew_id") not in self.assignments:
+                seen.add(i)
+                found.append(i)
+        for i in found:
+            heapq.heappush(self.unbooked, i)
+        free = [self.crew[i] for i in found]
+        return [free[i:i + needed] for i in (0, needed) if len(free) >= i + needed]
+
+def _most_staffed(demand: Dict[Tuple[int, ...], int], supply: Tuple[int, ...]) -> Dict[Tuple[int, ...], int]:
+    """How many flights of each deficit vector to staff so that the most flights are fully crewed.
+
+    demand maps a per-role deficit vector to its number of flights; supply
+    is the free crew per role. Usually most flights have nobody booked yet,
+    so their deficit is the full requirement and covers every other one:
+    staffing any of them only pays once all the others are staffed, so
+    either none are (and the rest is solved alone) or the others all are
+    and the top flights take what is left. Whatever remains goes to
+    _staff_knapsack.
+    """
+    top = tuple(map(max, zip(*demand)))
+    if len(demand) < 2 or top not in demand:
+        return _staff_knapsack(demand, supply)
+    rest = {d: n for d, n in demand.items() if d != top}
+    staffed = _most_staffed(rest, supply)
+    staffed[top] = 0
+    left = [s - sum(d[r] * n for d, n in rest.items()) for r, s in enumerate(supply)]
+    if min(left) >= 0:
+        k = min([demand[top]] + [x // t for x, t in zip(left, top) if t])
+        if sum(rest.values()) + k > sum(staffed.values()):
+            staffed = dict(rest)
+            staffed[top] = k
+    return staffed
+
+def _staff_knapsack(demand: Dict[Tuple[int, ...], int], supply: Tuple[int, ...]) -> Dict[Tuple[int, ...], int]:
+    """_most_staffed for any mix of deficit vectors.
+
+    Exact: a bounded knapsack over the roles whose total deficit exceeds
+    their supply (the others always fit), with each deficit vector's flights
+    split into 1, 2, 4, ... blocks that are either staffed or left short.
+    Each binding role is tracked as crew used (at most its supply) or as
+    deficit left short (at least its shortfall), whichever range is smaller,
+    so the cost is O(blocks * prod(min(supply, shortfall))) over those roles.
+    Needs numpy, but only when some role is short.
+    """
+    staffed = dict(demand)
+    short = [sum(d[r] * n for d, n in demand.items()) - supply[r] for r in range(len(supply))]
+    roles = [r for r in range(len(supply)) if short[r] > 0]
+    if not roles:
+        return staffed
+    blocks = []  # (deficit vector, flights) knapsack items
+    for d, n in demand.items():
+        if any(d[r] for r in roles):
+            staffed[d] = 0
+            m = 1
+            while n > 0:
+                blocks.append((d, min(m, n)))
+                n -= m
+                m *= 2
+    import numpy as np
+    used = [supply[r] <= short[r] for r in roles]  # per axis: crew used (True) or deficit left short
+    shape = tuple(min(supply[r], short[r]) + 1 for r in roles)
+    # Most flights staffed with at most i crew used / at least i deficit left short on each axis
+    best = np.full(shape, -1, np.int32)
+    best[tuple(slice(None) if u else 0 for u in used)] = 0
+    chosen = []
+    for d, m in blocks:
+        w = [d[r] * m for r in roles]
+        staff = np.full(shape, -1, np.int32)
+        if all(x < n for x, n, u in zip(w, shape, used) if u):
+            src = tuple(slice(0, n - x) if u else slice(None) for x, n, u in zip(w, shape, used))
+            dst = tuple(slice(x, n) if u else slice(None) for x, n, u in zip(w, shape, used))
+            staff[dst] = np.where(best[src] >= 0, best[src] + m, -1)
+        leave = best
+        for axis, (x, n, u) in enumerate(zip(w, shape, used)):
+            if x and not u:
+                leave = leave.take(np.maximum(np.arange(n) - x, 0), axis)
+        take = staff > leave
+        best = np.maximum(staff, leave)
+        chosen.append(np.packbits(take, axis=None))
+    at = [n - 1 for n in shape]
+    for (d, m), bits in zip(reversed(blocks), reversed(chosen)):
+        w = [d[r] * m for r in roles]
+        if np.unpackbits(bits, count=best.size)[np.ravel_multi_index(at, shape)]:
+            staffed[d] += m
+            at = [a - x if u else a for a, x, u in zip(at, w, used)]
+        else:
+            at = [a if u else max(a - x, 0) for a, x, u in zip(at, w, used)]
+    return staffed
+
+def solve_crew_batch(flights: List[str], crew_list: List[Dict], cfg: Dict,
+                     now: datetime = None) -> Dict[str, object]:
+    """Staff the whole day at once instead of flight by flight.
+
+    Every rested, unbooked crew member can fly any flight, so the matching
+    reduces to picking which flights to staff: each flight first uses crew
+    already booked on it, and only its remaining per-role deficit matters.
+    The flights to staff are chosen exactly (see _most_staffed), so no plan
+    has fewer fully crewed flights, the flight-by-flight path included.
+    Among flights with the same deficit, earlier ones are staffed first;
+    the rest are left short without stranding free crew on them.
+    Does not modify crew_list; see apply_crew_batch.
+    """
+    now = now or datetime.now(timezone.utc)
+    req = {"pilot": cfg.get("required_pilots", 2), "cabin": cfg.get("required_cabin_crew", 1)}
+    rest = timedelta(hours=cfg.get("crew_rest_hours", 12))
+    wanted = set(flights)
+    free: Dict[str, List[Dict]] = {role: [] for role in req}
+    pinned: Dict[str, Dict[str, List[Dict]]] = {f: {role: [] for role in req} for f in flights}
+    for c in crew_list:
+        role = c.get("role", "").lower()
+        end = _rest_end(c)
+        if role not in req or (end is not None and end + rest > now):
+            continue
+        booked = crew_assignments.get(c.get("crew_id")) or c.get("assigned_flight")
+        if booked is None:
+            free[role].append(c)
+        elif booked in wanted:
+            pinned[booked][role].append(c)
+
+    deficit = {f: tuple(max(0, n - len(pinned[f][role])) for role, n in req.items()) for f in flights}
+    demand: Dict[Tuple[int, ...], int] = {}
+    for f in flights:
+        demand[deficit[f]] = demand.get(deficit[f], 0) + 1
+    quota = _most_staffed(demand, tuple(len(free[role]) for role in req))
+    staffed = set()
+    for f in flights:
+        if quota[deficit[f]]:
+            quota[deficit[f]] -= 1
+            staffed.add(f)
+
+    assignments, shortages, taken = {}, [], {role: 0 for role in req}
+    for f in flights:  # hand out free crew in roster order, flights in their given order
+        crew = []
+        for (role, n), d in zip(req.items(), deficit[f]):
+            crew += pinned[f][role][:n]
+            if f in staffed:
+                crew += free[role][taken[role]:taken[role] + d]
+                taken[role] += d
+        assignments[f] = crew
+        if f not in staffed:
+            shortages.append(f)
+    return {"assignments": assignments, "shortages": shortages}
+
+def apply_crew_batch(result: Dict[str, object]) -> None:
+    """Record a solve_crew_batch result in crew_assignments and on the crew."""
+    for flight, crew in result["assignments"].items():
+        for c in crew:
+            crew_assignments[c.get("crew_id")] = flight
+            c["assigned_flight"] = flight
+
+def compare_with_greedy(flights: List[str], crew_list: List[Dict], cfg: Dict,
+                        now: datetime = None, batch: Dict[str, object] = None) -> Dict[str, int]:
+    """Shortage counts of the flight-by-flight path vs solve_crew_batch, without booking anyone.
+
+    Pass batch to reuse a solve_crew_batch result for the same flights
+    instead of solving again.
+    """
+    now = now or datetime.now(timezone.utc)
+    roster = [dict(c) for c in crew_list]
+    pool = CrewPool(roster, cfg, dict(crew_assignments))
+    greedy = sum(pool.assign(f, now)[1] for f in flights)
+    batch = len((batch or solve_crew_batch(flights, crew_list, cfg, now))["shortages"])
+    return {"greedy_shortages": greedy, "batch_shortages": batch, "shortages_removed": greedy - batch}
@@ -61,4 +61,12 @@ def render_dashboard(summary: dict):
             print(f"  {i}. {d.get('flight_id')}: {d.get('issue')} -> {alt} (+{d.get('extra_time_min')}min)")
         print()
     
+    # Popular routes
+    routes = summary.get('popular_routes', {})
+    if routes:
+        print("POPULAR ROUTES:")
+        for i, (route, n) in enumerate(routes.items(), 1):
+            print(f"  {i}. {route} ({n} flights)")
+        print()
+    
     print("="*60 + "\n")
\ No newline at end of file
@@ -1,51 +1,55 @@
-"""Rule-based delay predictor."""
-from typing import List, Tuple, Dict
-from pathlib import Path
-import json
+"""Rule-based delay predictor; the delay rules come from rules.compile_rules."""
+from typing import Dict, Iterable, List, Optional, Tuple
+from modules.log_processor import load_json
+from modules.detectors import by_time
+from modules.rules import DELAY_KINDS, compile_rules
 
-DATA_PATH = Path(__file__).resolve().parents[1] / "data"
+Hits = List[Tuple[str, int]]  # (reason, delay minutes) pairs
+
+def _total(hits: Hits) -> Tuple[int, List[str]]:
+    return int(sum(m for _, m in hits)), [r for r, _ in hits]
 
 def predict_delay_for_flight(flight_id: str, engine_logs: List[dict], weather_logs: List[dict],
-                             altitude_logs: List[dict], config: Dict) -> Tuple[int, List[str]]:
-    reasons, delay = [], 0
-    cabin_file = DATA_PATH / "cabin_pressure_logs.json"
-    cabin_logs = json.load(cabin_file.open()) if cabin_file.exists() else []
-    
-    # Weather delays
-    for w in [x for x in weather_logs if x.get("flight_id") == flight_id]:
-        if w.get("crosswind", 0) > config.get("crosswind_threshold_knots", 40):
-            reasons.append("High crosswind")
-            delay += 30
-        if w.get("thunderstorm", False):
-            reasons.append("Thunderstorm reported")
-            delay += 60
-        if w.get("visibility", 999999) < config.get("visibility_threshold_m", 1500):
-            reasons.append("Low visibility")
-            delay += 45
-    
-    # Engine delays
-    for e in [x for x in engine_logs if x.get("flight_id") == flight_id]:
-        if e.get("expected_thrust") and abs(e.get("engine_thrust", 0) - e.get("expected_thrust")) / e.get("expected_thrust") * 100 > config.get("engine_thrust_deviation_pct", 20):
-            reasons.append("Engine thrust deviation")
-            delay += 50
-        if e.get("vibration", 0) > config.get("engine_vibration_threshold", 5.0):
-            reasons.append("High engine vibration")
-            delay += 40
-    
-    # Turbulence delays
-    if any(a.get("turbulence", 0) >= config.get("turbulence_moderate_level", 4.0) for a in altitude_logs if a.get("flight_id") == flight_id):
-        reasons.append("Turbulence advisory")
-        delay += 15
-    
-    # Cabin pressure delays
-    prev = None
-    for c in [x for x in cabin_logs if x.get("flight_id") == flight_id]:
-        if c.get("pressure_rate_change", 0) > config.get("cabin_pressure_drop_threshold", 500):
-            reasons.append("Sudden cabin pressure drop")
-            delay += 35
-        if prev and abs(c.get("cabin_pressure", 0) - prev) > 300:
-            reasons.append("Rapid cabin pressure change")
-            delay += 25
-        prev = c.get("cabin_pressure", 0)
-    
-    return int(delay), reasons
\ No newline at end of file
+                             altitude_logs: List[dict], config: Dict,
+                             cabin_logs: Optional[List[dict]] = None) -> Tuple[int, List[str]]:
+    hits: Hits = []
+    if cabin_logs is None:  # callers with a TelemetryStore pass the flight's slice
+        cabin_logs = load_json("cabin_pressure_logs.json")
+    rules = compile_rules(config)
+    logs = {"weather": weather_logs, "engine": engine_logs, "altitude": altitude_logs, "cabin": cabin_logs}
+
+    # Weather, engine, turbulence and cabin delays, in that order
+    for kind in DELAY_KINDS:
+        check = rules.flight_delay_check(kind)
+        records = (x for x in logs[kind] if x.get("flight_id") == flight_id)
+        if rules.time_ordered(kind):  # swings are measured between consecutive readings in time order
+            records = by_time(records)
+        for r in records:
+            hits += check(r)
+
+    return _total(hits)
+
+def predict_delays(config: Dict, engine_logs: Iterable[dict], weather_logs: Iterable[dict],
+                   altitude_logs: Iterable[dict], cabin_logs: Iterable[dict]) -> Dict[str, Tuple[int, List[str]]]:
+    """predict_delay_for_flight for every flight in one pass over each log.
+
+    Inputs may be generators (see log_processor.iter_json); only triggered
+    reasons are kept, so memory grows with flights rather than records.
+    Cabin records are taken in arrival order, so they must already be in
+    time order per flight: late readings are skipped and reported with a
+    warning. Flights without any delay are absent from the result.
+    """
+    rules = compile_rules(config)
+    logs = {"weather": weather_logs, "engine": engine_logs, "altitude": altitude_logs, "cabin": cabin_logs}
+    found: Dict[str, List[Hits]] = {}  # per flight, hits per log in DELAY_KINDS order
+    late = 0
+    for k, kind in enumerate(DELAY_KINDS):
+        check = rules.delay_check(kind)
+        for r in logs[kind]:
+            hits = check(r)
+            if hits:
+                found.setdefault(r.get("flight_id"), [[] for _ in DELAY_KINDS])[k].extend(hits)
+        late += sum(d.late for d in getattr(check, "detectors", ()))
+    if late:
+        print(f"Warning: skipped {late} out-of-order readings; streamed logs must be time-ordered per flight")
+    return {fid: _total([h for per_log in hits for h in per_log]) for fid, hits in found.items()}
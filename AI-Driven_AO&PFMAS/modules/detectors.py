@@ -0,0 +1,88 @@
+"""Stateful detectors shared by batch runs and streaming input.
+
+State is kept per key (aircraft or flight), each record is processed
+once in O(1) amortized time, and alerts carry the timestamp of the
+record that completed the pattern. Feed records in time order: batch
+callers sort with by_time(); streams must be time-ordered per key, and
+late records are ignored but counted in each detector's `late`.
+"""
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Hashable, Iterable, List, Optional
+
+def parse_ts(value) -> Optional[datetime]:
+    """Parsed timestamp as naive UTC (naive input is taken as UTC), or None if missing/unparseable.
+
+    Naive results keep the common case free of tzinfo handling, which
+    would cost more than the parse itself.
+    """
+    try:
+        ts = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return ts if ts.tzinfo is None else (ts - ts.utcoffset()).replace(tzinfo=None)
+
+def by_time(records: Iterable[dict]) -> List[dict]:
+    """Stable sort by timestamp; records without a parseable one keep their order at the end."""
+    keyed = [(parse_ts(r.get("timestamp")), i, r) for i, r in enumerate(records)]
+    keyed.sort(key=lambda k: (k[0] is None, k[0] or datetime.min, k[1]))
+    return [r for _, _, r in keyed]
+
+def record_key(r: dict) -> Hashable:
+    """Detector state is per aircraft, falling back to the flight when unknown."""
+    return r.get("aircraft_id") or r.get("flight_id")
+
+class WindowCounter:
+    """Fires when a key sees `count` events within `window` (e.g. N in M minutes).
+
+    Each key keeps a ring buffer of recent event times. One alert is raised
+    per episode: the detector re-arms once the window holds fewer than
+    `count` events again, or once it empties (so count 1 fires whenever the
+    gap since the previous event exceeds the window).
+    """
+
+    def __init__(self, count: int, window: timedelta):
+        self.count, self.window = count, window
+        self.events: Dict[Hashable, Deque[datetime]] = {}
+        self.active = set()
+        self.late = 0  # out-of-order events ignored
+
+    def add(self, key: Hashable, ts: Optional[datetime]) -> Optional[int]:
+        """Record an event; return the number of events in the window if an alert fires."""
+        if ts is None:
+            return None
+        q = self.events.setdefault(key, deque())
+        if q and ts < q[-1]:
+            self.late += 1
+            return None
+        while q and ts - q[0] > self.window:
+            q.popleft()
+        if not q:
+            self.active.discard(key)
+        q.append(ts)
+        if len(q) < self.count:
+            self.active.discard(key)
+        elif key not in self.active:
+            self.active.add(key)
+            return len(q)
+        return None
+
+class SwingDetector:
+    """Fires when a value moves more than `threshold` from the key's previous value.
+
+    A previous value of 0 or a missing one never fires, matching the
+    delay predictor's original rule.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.last: Dict[Hashable, tuple] = {}
+        self.late = 0  # out-of-order readings ignored
+
+    def update(self, key: Hashable, ts: Optional[datetime], value) -> bool:
+        prev = self.last.get(key)
+        if prev is not None and ts is not None and prev[0] is not None and ts < prev[0]:
+            self.late += 1
+            return False
+        self.last[key] = (ts, value)
+        return bool(prev and prev[1]) and abs(value - prev[1]) > self.threshold
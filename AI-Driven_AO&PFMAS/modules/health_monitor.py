@@ -1,71 +1,140 @@
 """Monitors engine and altitude logs and writes alerts."""
 from pathlib import Path
-import json
 from datetime import datetime
+import os
+from modules.log_processor import load_cached, load_json
+from modules.detectors import parse_ts, record_key
+from modules.rules import ALERT_KINDS, compile_rules
+from modules.rotation import RotatingWriter, rotation_settings
 
 BASE = Path(__file__).resolve().parents[1]
-LOGS = BASE / "logs"
+LOGS = Path(os.environ.get("AOPFMAS_LOGS_DIR", BASE / "logs"))
 CONFIG_PATH = BASE / "airline_config.json"
-DATA_PATH = BASE / "data"
 
 def load_config():
-    return json.load(CONFIG_PATH.open()) if CONFIG_PATH.exists() else {}
-
-def monitor_health(engine_logs, altitude_logs):
-    cfg = load_config()
-    alerts, health_alerts, critical_alerts = [], [], []
-    cabin_logs = json.load((DATA_PATH / "cabin_pressure_logs.json").open()) if (DATA_PATH / "cabin_pressure_logs.json").exists() else []
-    
-    # Engine vibration (CRITICAL)
-    for e in [x for x in engine_logs if x.get("vibration", 0) > cfg.get("engine_vibration_threshold", 5.0)]:
-        alerts.append(f"{e.get('timestamp')} {e.get('flight_id')} HIGH_VIBRATION vibration={e.get('vibration')}")
-        kv = f"timestamp: {e.get('timestamp')}, flight: {e.get('flight_id')}, alert: HIGH_VIBRATION, vibration: {e.get('vibration')}, threshold: 5.0"
-        health_alerts.append(kv)
-        critical_alerts.append(kv)
-    
-    # Rapid altitude (CRITICAL)
-    for a in [x for x in altitude_logs if x.get("altitude", 0) < 1500 and x.get("turbulence", 0) > cfg.get("turbulence_moderate_level", 4.0)]:
-        alerts.append(f"{a.get('timestamp')} {a.get('flight_id')} RAPID_ALTITUDE_FLUCT altitude={a.get('altitude')} turbulence={a.get('turbulence')}")
-        kv = f"timestamp: {a.get('timestamp')}, flight: {a.get('flight_id')}, alert: RAPID_ALTITUDE_FLUCT, altitude: {a.get('altitude')}m, turbulence: {a.get('turbulence')}"
-        health_alerts.append(kv)
-        critical_alerts.append(kv)
-    
-    # Repeated turbulence (WARNING)
-    turb = {}
-    for a in altitude_logs:
-        if a.get("turbulence", 0) > cfg.get("turbulence_moderate_level", 4.0):
-            turb[a.get('flight_id')] = turb.get(a.get('flight_id'), 0) + 1
-    for fid, cnt in [(f, c) for f, c in turb.items() if c >= 2]:
-        ts = altitude_logs[-1].get('timestamp', datetime.now().isoformat())
-        alerts.append(f"{ts} {fid} REPEATED_TURBULENCE count={cnt}")
-        health_alerts.append(f"timestamp: {ts}, flight: {fid}, alert: REPEATED_TURBULENCE, occurrences: {cnt}")
-    
-    # Abnormal fuel (CRITICAL)
-    for e in [x for x in engine_logs if x.get('engine_thrust', 100) < x.get('expected_thrust', 100) * 0.85 and x.get('fuel_burn', 0) > 2600]:
-        alerts.append(f"{e.get('timestamp')} {e.get('flight_id')} ABNORMAL_FUEL_BURN fuel_burn={e.get('fuel_burn')} thrust_deviation={(e.get('expected_thrust', 100)-e.get('engine_thrust', 100)):.1f}%")
-        kv = f"timestamp: {e.get('timestamp')}, flight: {e.get('flight_id')}, alert: ABNORMAL_FUEL_BURN, fuel_burn: {e.get('fuel_burn')}, thrust_deviation: {e.get('expected_thrust', 100)-e.get('engine_thrust', 100):.1f}%"
-        health_alerts.append(kv)
-        critical_alerts.append(kv)
-    
-    # High cabin temp (WARNING)
-    for log in [x for x in cabin_logs if x.get("cabin_temperature", 0) > cfg.get("high_cabin_temp_c", 30)]:
-        alerts.append(f"{log.get('timestamp')} {log.get('flight_id')} HIGH_CABIN_TEMP temperature={log.get('cabin_temperature')}")
-        health_alerts.append(f"timestamp: {log.get('timestamp')}, flight: {log.get('flight_id')}, alert: HIGH_CABIN_TEMP, temperature: {log.get('cabin_temperature')}C, limit: 30C")
-    
-    # High cabin pressure (WARNING)
-    for log in [x for x in cabin_logs if x.get("cabin_altitude", 0) > 8000 or x.get("pressure_rate_change", 0) > 500]:
-        alerts.append(f"{log.get('timestamp')} {log.get('flight_id')} HIGH_CABIN_PRESSURE cabin_altitude={log.get('cabin_altitude', 0)} pressure_rate={log.get('pressure_rate_change', 0)}")
-        health_alerts.append(f"timestamp: {log.get('timestamp')}, flight: {log.get('flight_id')}, alert: HIGH_CABIN_PRESSURE, cabin_altitude: {log.get('cabin_altitude', 0)}ft, pressure_rate: {log.get('pressure_rate_change', 0)}ft/min")
-    
-    # Write logs
-    LOGS.mkdir(parents=True, exist_ok=True)
-    if health_alerts:
-        with (LOGS / "aircraft_health_alerts.log").open("w", encoding="utf-8") as f:
-            f.write(f"AIRCRAFT HEALTH ALERTS - Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("\n".join(health_alerts))
-    if critical_alerts:
-        with (LOGS / "critical_flight_alerts.log").open("w", encoding="utf-8") as f:
-            f.write(f"CRITICAL FLIGHT ALERTS - Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("\n".join(critical_alerts))
-    
-    return alerts
\ No newline at end of file
+    return load_cached(CONFIG_PATH, {})
+
+def publish_alerts(found, cfg=None):
+    """Append formatted alerts to the alert logs and return the console lines."""
+    with AlertAppender(LOGS, cfg, label="Generated") as appender:
+        appender.write(found)
+    return [alert for alert, _, _ in found]
+
+def monitor_health(engine_logs, altitude_logs, cabin_logs=None, cfg=None):
+    cfg = load_config() if cfg is None else cfg
+    if cabin_logs is None:
+        cabin_logs = load_json("cabin_pressure_logs.json")
+    rules = compile_rules(cfg)
+
+    # Each log is walked once, so generators from log_processor.iter_json work;
+    # alerts are bucketed per rule and emitted in the configured rule order.
+    found = {rule: [] for rule in rules.alerts}
+    for kind, records in (("engine", engine_logs), ("altitude", altitude_logs), ("cabin", cabin_logs)):
+        check = rules.alert_check(kind)
+        # windowed rules keep the raw record for replay, the rest format it right away
+        sinks = [(found[rule].append, None if rule.window else rule.format) for rule in rules.alert_rules(kind)]
+        for r in records:
+            for i in check(r):
+                add, fmt = sinks[i]
+                add(fmt(r) if fmt else r)
+
+    # Windowed rules (REPEATED_TURBULENCE) replay their matches in time order,
+    # stamped with the reading that completed the window
+    return publish_alerts([a for rule, hits in found.items() for a in (rule.replay(hits) if rule.window else hits)], cfg)
+
+def monitor_health_stream(engine_logs, altitude_logs, cabin_logs, cfg=None):
+    """monitor_health for streamed logs, appending alerts as they fire.
+
+    Each record goes through a HealthStream and only the returned console
+    lines are kept, so memory does not grow with the logs. The logs must be time-ordered per aircraft, as streamed
+    logs are; late readings are skipped with a warning. Alerts come out log
+    by log in arrival order rather than grouped by rule, so the lines are
+    the same as monitor_health's but may be ordered differently.
+    """
+    cfg = load_config() if cfg is None else cfg
+    stream, alerts = HealthStream(cfg), []
+    with AlertAppender(LOGS, cfg, label="Generated") as appender:
+        for kind, records in (("engine", engine_logs), ("altitude", altitude_logs), ("cabin", cabin_logs)):
+            for r in records:
+                found = stream.feed(kind, r)
+                if found:
+                    appender.write(found)
+                    alerts += [alert for alert, _, _ in found]
+    if stream.late:
+        print(f"Warning: skipped {stream.late} out-of-order readings; streamed logs must be time-ordered per aircraft")
+    return alerts
+
+class HealthStream:
+    """Applies monitor_health's rules to one record at a time.
+
+    Alerts come out in arrival order; windowed rules use the same
+    sliding-window detector as the batch path, so records must arrive in
+    time order per aircraft. Late ones are counted in `late`.
+    """
+
+    def __init__(self, cfg):
+        rules = compile_rules(cfg)
+        self.checks = {kind: (rules.alert_check(kind), rules.alert_rules(kind)) for kind in ALERT_KINDS}
+        self.windows = {rule: rule.window_counter() for rule in rules.alerts if rule.window}
+
+    def feed(self, kind, r):
+        if kind not in self.checks:
+            return []
+        check, kind_rules = self.checks[kind]
+        found = []
+        for i in check(r):
+            rule = kind_rules[i]
+            if rule.window:
+                cnt = self.windows[rule].add(record_key(r), parse_ts(r.get("timestamp")))
+                if cnt:
+                    found.append(rule.format(r, cnt))
+            else:
+                found.append(rule.format(r))
+        return found
+
+    @property
+    def late(self):
+        return sum(w.late for w in self.windows.values())
+
+class AlertAppender:
+    """Appends alert lines to the health and critical logs, keeping both open.
+
+    Both logs are RotatingWriters configured by cfg["output_rotation"];
+    each gets a "<TITLE> - <label>: <time>" header before its first line.
+    Writes are buffered; call flush() once per batch of records.
+    """
+
+    def __init__(self, logs_dir=None, cfg=None, label="Appended from"):
+        logs_dir = LOGS if logs_dir is None else logs_dir
+        settings = rotation_settings(cfg)
+        self.health = RotatingWriter(logs_dir / "aircraft_health_alerts.log", settings)
+        self.critical = RotatingWriter(logs_dir / "critical_flight_alerts.log", settings)
+        self.header = f"{label}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        self._untitled = {self.health: "AIRCRAFT HEALTH ALERTS", self.critical: "CRITICAL FLIGHT ALERTS"}
+
+    def _lines(self, log, lines):
+        if not lines:
+            return
+        title = self._untitled.pop(log, None)
+        if title:
+            log.write_block([f"{title} - {self.header}", ""], separate=True)
+        log.write_lines(lines)
+
+    def write(self, found):
+        found = found if isinstance(found, list) else list(found)
+        self._lines(self.health, [kv for _, kv, _ in found])
+        self._lines(self.critical, [kv for _, kv, critical in found if critical])
+
+    def flush(self):
+        self.health.flush()
+        self.critical.flush()
+
+    def close(self):
+        self.health.close()
+        self.critical.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
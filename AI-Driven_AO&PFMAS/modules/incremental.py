@@ -0,0 +1,75 @@
+"""Per-flight result cache for incremental (delta) runs."""
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import hashlib
+import json
+from modules.log_processor import DATA_DIR, LOG_FILES, TelemetryStore
+
+BASE = Path(__file__).resolve().parents[1]
+STATE_PATH = BASE / "output" / "state" / "flight_results.json"
+
+def _digest(obj) -> str:
+    return hashlib.blake2b(repr(obj).encode(), digest_size=16).hexdigest()
+
+def _file_stamps() -> Dict[str, List[int]]:
+    stamps = {}
+    for fn in LOG_FILES.values():
+        path = DATA_DIR / fn
+        if path.exists():
+            st = path.stat()
+            stamps[fn] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+def _summary(records: List[dict]) -> list:
+    """Cheap stand-in for a flight's records in one log: count, high-water timestamp, newest record."""
+    if not records:
+        return [0]
+    return [len(records), max(str(r.get("timestamp", "")) for r in records), _digest(records[-1])]
+
+class ResultCache:
+    """Stores each flight's evaluation with a fingerprint of its inputs.
+
+    A fingerprint covers the config plus, per log, the flight's record
+    count, latest timestamp and newest record, so a flight is re-evaluated
+    when records are appended for it or the config changes. Logs are
+    expected to grow by appending: an in-place edit that keeps a flight's
+    count and newest record goes unnoticed (delete the state file to force
+    a full run). Summaries are only recomputed for data files whose mtime
+    or size changed, and nothing is if none did.
+    """
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = path
+        try:
+            with path.open(encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        self.files = state.get("files", {})
+        self.config = state.get("config")
+        self.inputs: Dict[str, Dict[str, list]] = state.get("inputs", {})  # log kind -> flight -> _summary
+        self.flights: Dict[str, Dict] = state.get("flights", {})
+
+    def evaluate(self, store: TelemetryStore, cfg: Dict,
+                 evaluate: Callable[[List[str]], List[Dict]]) -> Tuple[List[Dict], List[str]]:
+        """Return results for every flight in store, calling evaluate() on stale ones only."""
+        flights, config, files = store.flights(), _digest(sorted(cfg.items())), _file_stamps()
+        if config == self.config and files == self.files and set(flights) == set(self.flights):
+            return [self.flights[f]["result"] for f in flights], []
+        for kind, fn in LOG_FILES.items():
+            if kind not in self.inputs or files.get(fn) != self.files.get(fn):
+                self.inputs[kind] = {f: _summary(records) for f, records in store.by_flight.get(kind, {}).items()}
+        fingerprints = {f: _digest([config] + [self.inputs[kind].get(f) for kind in LOG_FILES]) for f in flights}
+        stale = [f for f in flights if self.flights.get(f, {}).get("fingerprint") != fingerprints[f]]
+        fresh = {r["flight"]: r for r in evaluate(stale)} if stale else {}
+        self.flights = {f: {"fingerprint": fingerprints[f], "result": fresh[f] if f in fresh else self.flights[f]["result"]}
+                        for f in flights}
+        self.config, self.files = config, files
+        return [self.flights[f]["result"] for f in flights], stale
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "config": self.config, "inputs": self.inputs, "flights": self.flights}, f)
+        tmp.replace(self.path)
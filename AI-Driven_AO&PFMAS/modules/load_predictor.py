@@ -1,5 +1,7 @@
 """Passenger load predictor using historical averages."""
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import List, Dict, Hashable, Optional, Tuple
+from modules.detectors import parse_ts
 
 def predict_load(flight_id: str, historical: Optional[List[Dict]] = None) -> Dict:
     """Return expected load plus simple over/under-utilization flags."""
@@ -14,3 +16,132 @@ def predict_load(flight_id: str, historical: Optional[List[Dict]] = None) -> Dic
     overbooking = capacity is not None and avg_booked > capacity
     under = capacity is not None and avg_checked < (capacity * 0.5)
     return {"flight_id": flight_id, "expected": avg_booked, "overbooking_risk": overbooking, "under_utilized": under}
+
+class _Aggregates:
+    """Running booking totals per key, stored column-wise so batches vectorize."""
+
+    def __init__(self):
+        self.slot: Dict[Hashable, int] = {}
+        self.count: List[int] = []
+        self.booked: List[float] = []
+        self.checked: List[float] = []
+        self.capacity: List[Optional[float]] = []  # latest record's capacity
+        self.ewma_booked: List[float] = []
+        self.dow_count: List[List[int]] = []  # per weekday, Monday first
+        self.dow_booked: List[List[float]] = []
+
+    def add(self, key: Hashable, booked, checked, capacity, weekday: Optional[int], alpha: float) -> None:
+        i = self.slot.get(key)
+        if i is None:
+            i = self.slot[key] = len(self.count)
+            for col, start in ((self.count, 0), (self.booked, 0), (self.checked, 0), (self.capacity, None),
+                               (self.ewma_booked, booked)):
+                col.append(start)
+            self.dow_count.append([0] * 7)
+            self.dow_booked.append([0] * 7)
+        elif self.count[i]:
+            self.ewma_booked[i] = alpha * booked + (1 - alpha) * self.ewma_booked[i]
+        self.count[i] += 1
+        self.booked[i] += booked
+        self.checked[i] += checked
+        self.capacity[i] = capacity
+        if weekday is not None:
+            self.dow_count[i][weekday] += 1
+            self.dow_booked[i][weekday] += booked
+
+    def mean_booked(self, key: Hashable, weekday: Optional[int] = None) -> Optional[float]:
+        i = self.slot.get(key)
+        if i is None:
+            return None
+        if weekday is None:
+            return self.booked[i] / self.count[i]
+        n = self.dow_count[i][weekday]
+        return self.dow_booked[i][weekday] / n if n else None
+
+class LoadForecaster:
+    """Booking aggregates per flight, route and day of week, updated incrementally.
+
+    update() folds in one passenger_load record in O(1). predict() is also
+    O(1) and returns exactly what predict_load() gives for the flight's
+    whole history; predict_many() does the same for many flights in one
+    NumPy pass. Feed records in booking order: the EWMA and the "latest"
+    capacity follow it. Routes come from origin/destination when present.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.flights = _Aggregates()
+        self.routes = _Aggregates()
+        self.route_of: Dict[str, Tuple] = {}
+
+    @classmethod
+    def from_records(cls, records, alpha: float = 0.3) -> "LoadForecaster":
+        forecaster = cls(alpha)
+        for r in records:
+            forecaster.update(r)
+        return forecaster
+
+    def update(self, r: Dict) -> None:
+        booked, checked, capacity = r.get("booked", 0), r.get("checked_in", 0), r.get("capacity")
+        ts = parse_ts(r.get("timestamp"))
+        weekday = ts.weekday() if ts else None
+        self.flights.add(r.get("flight_id"), booked, checked, capacity, weekday, self.alpha)
+        if r.get("origin") and r.get("destination"):
+            route = (r["origin"], r["destination"])
+            self.route_of[r.get("flight_id")] = route
+            self.routes.add(route, booked, checked, capacity, weekday, self.alpha)
+
+    def predict(self, flight_id: str) -> Dict:
+        """predict_load(flight_id, <all records seen for it>) without the history scan."""
+        agg, i = self.flights, self.flights.slot.get(flight_id)
+        if i is None:
+            return {"flight_id": flight_id, "expected": None, "overbooking_risk": False, "under_utilized": False}
+        avg_booked = int(agg.booked[i] / agg.count[i])
+        avg_checked = int(agg.checked[i] / agg.count[i])
+        capacity = agg.capacity[i]
+        overbooking = capacity is not None and avg_booked > capacity
+        under = capacity is not None and avg_checked < (capacity * 0.5)
+        return {"flight_id": flight_id, "expected": avg_booked, "overbooking_risk": overbooking, "under_utilized": under}
+
+    def predict_many(self, flight_ids: List[str]) -> List[Dict]:
+        """predict() for every flight at once; loops in Python only if numpy is missing."""
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        agg = self.flights
+        if np is None or not agg.count:
+            return [self.predict(f) for f in flight_ids]
+        idx = np.fromiter((agg.slot.get(f, -1) for f in flight_ids), np.int64, len(flight_ids))
+        known = idx >= 0
+        take = np.where(known, idx, 0)
+        count = np.asarray(agg.count, dtype=np.float64)[take]
+        booked = np.trunc(np.asarray(agg.booked, dtype=np.float64)[take] / count)
+        checked = np.trunc(np.asarray(agg.checked, dtype=np.float64)[take] / count)
+        capacity = np.asarray(agg.capacity, dtype=np.float64)[take]  # None becomes nan and compares False
+        with np.errstate(invalid="ignore"):
+            over = known & (booked > capacity)
+            under = known & (checked < capacity * 0.5)
+        expected = booked.astype(np.int64).tolist()
+        return [{"flight_id": f, "expected": e if k else None, "overbooking_risk": o, "under_utilized": u}
+                for f, e, k, o, u in zip(flight_ids, expected, known.tolist(), over.tolist(), under.tolist())]
+
+    def load_factor(self, flight_id: str, expected: Optional[int] = None) -> Optional[float]:
+        """Expected bookings over the latest capacity (1 if unknown); None without history."""
+        i = self.flights.slot.get(flight_id)
+        if i is None:
+            return None
+        if expected is None:
+            expected = int(self.flights.booked[i] / self.flights.count[i])
+        return expected / (self.flights.capacity[i] or 1)
+
+    def forecast(self, flight_id: str, when: Optional[datetime] = None) -> Dict:
+        """Booking forecasts for a flight: overall mean, EWMA, same-weekday mean and route mean."""
+        i = self.flights.slot.get(flight_id)
+        weekday = when.weekday() if when else None
+        route = self.route_of.get(flight_id)
+        return {"flight_id": flight_id,
+                "mean": self.flights.mean_booked(flight_id),
+                "ewma": self.flights.ewma_booked[i] if i is not None else None,
+                "day_of_week": self.flights.mean_booked(flight_id, weekday) if weekday is not None else None,
+                "route": self.routes.mean_booked(route) if route else None}
@@ -1,22 +1,161 @@
 """Utilities to load data logs."""
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
 import json
+import os
+import re
 BASE = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE / "data"  # shared data folder
+DATA_DIR = Path(os.environ.get("AOPFMAS_DATA_DIR", BASE / "data"))  # shared data folder
+
+# Log kinds kept by the telemetry store, and the files that feed flight discovery
+LOG_FILES = {
+    "engine": "engine_logs.json",
+    "weather": "weather_logs.json",
+    "altitude": "altitude_logs.json",
+    "cabin": "cabin_pressure_logs.json",
+    "passenger": "passenger_load.json",
+}
+FLIGHT_SOURCES = ["engine", "weather", "altitude", "passenger"]
+
+# Parsed JSON keyed by path, validated against (mtime_ns, size) on every lookup
+_json_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_cache_counters = {"hits": 0, "misses": 0}
+_io_counters = {"bytes_read": 0}  # data file bytes parsed, cached or streamed
+
+def load_cached(path: Path, default=None):
+    """Parse a JSON file at most once per change; return default if missing.
+
+    The cached object is shared between callers, so treat it as read-only.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return default
+    stamp, entry = (st.st_mtime_ns, st.st_size), _json_cache.get(str(path))
+    if entry and entry[0] == stamp:
+        _cache_counters["hits"] += 1
+        return entry[1]
+    _cache_counters["misses"] += 1
+    _io_counters["bytes_read"] += st.st_size
+    with path.open() as f:
+        data = json.load(f)
+    _json_cache[str(path)] = (stamp, data)
+    return data
+
+def cache_stats() -> Dict[str, int]:
+    """Hit/miss counters plus the number of files currently cached."""
+    return {**_cache_counters, "entries": len(_json_cache)}
+
+def io_stats() -> Dict[str, int]:
+    """Bytes read from disk by load_cached and iter_json since start-up."""
+    return dict(_io_counters)
+
+def clear_cache() -> None:
+    _json_cache.clear()
+    _cache_counters.update(hits=0, misses=0)
 
 def load_json(filename: str):
     """Load a JSON file from data directory; return [] if missing."""
-    path = DATA_DIR / filename
+    return load_cached(DATA_DIR / filename, [])
+
+_SEPARATORS = re.compile(r"[\s,]*")
+# What may be left at the end of a buffer that cut a value short: part of a
+# number, literal or \uXXXX escape (unterminated strings are told by message)
+_PARTIAL = re.compile(r"-?(\d+)?(\.\d*)?([eE][+-]?\d*)?|t(r(ue?)?)?|f(a(l(se?)?)?)?|n(u(ll?)?)?|u[0-9a-fA-F]{0,4}")
+
+def _iter_array(f, chunk_size: int) -> Iterator[dict]:
+    """Decode the elements of a top-level JSON array one at a time."""
+    decoder, buf, pos = json.JSONDecoder(), "", 0
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if buf.startswith("]", pos):
+            return
+        try:
+            obj, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            # Only an element cut off by the end of the buffer needs more data;
+            # anything else is malformed, so fail now instead of buffering the rest
+            if not (e.msg.startswith("Unterminated string") or _PARTIAL.fullmatch(buf, e.pos)):
+                raise
+            chunk = f.read(chunk_size)
+            if not chunk:
+                if pos >= len(buf):
+                    return
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield obj
+
+def iter_json(filename, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Stream records from a data file without loading it whole.
+
+    Accepts a JSON array (parsed incrementally) or newline-delimited JSON;
+    the format is detected from the first non-blank character. filename is
+    relative to DATA_DIR unless a Path is given. Yields nothing if the file
+    is missing.
+    """
+    path = filename if isinstance(filename, Path) else DATA_DIR / filename
     if not path.exists():
-        return []
+        return
+    _io_counters["bytes_read"] += path.stat().st_size
     with path.open() as f:
-        return json.load(f)
+        head = f.read(chunk_size)
+        stripped = head.lstrip()
+        if stripped.startswith("["):
+            f.seek(0)
+            f.read(len(head) - len(stripped) + 1)  # consume up to and including "["
+            yield from _iter_array(f, chunk_size)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 def get_all_flights():
     """Collect distinct flight_ids across key log files."""
     flights = set()
     for fn in ["engine_logs.json", "weather_logs.json", "altitude_logs.json", "passenger_load.json"]:
-        for e in load_json(fn):
+        for e in iter_json(fn):
             if "flight_id" in e:
                 flights.add(e["flight_id"])
     return sorted(list(flights))
+
+class TelemetryStore:
+    """Loads every log once and indexes records by flight_id and aircraft_id.
+
+    Records keep their file order inside each slice, so per-flight rules
+    see exactly what a full-list filter would have produced.
+    """
+
+    def __init__(self, logs: Dict[str, List[dict]]):
+        self.logs = logs
+        self.by_flight: Dict[str, Dict[str, List[dict]]] = {}
+        self.by_aircraft: Dict[str, Dict[str, List[dict]]] = {}
+        for kind, records in logs.items():
+            flights, aircraft = {}, {}
+            for r in records:
+                if "flight_id" in r:
+                    flights.setdefault(r["flight_id"], []).append(r)
+                if "aircraft_id" in r:
+                    aircraft.setdefault(r["aircraft_id"], []).append(r)
+            self.by_flight[kind], self.by_aircraft[kind] = flights, aircraft
+
+    @classmethod
+    def load(cls, files: Dict[str, str] = None) -> "TelemetryStore":
+        return cls({kind: load_json(fn) for kind, fn in (files or LOG_FILES).items()})
+
+    def all(self, kind: str) -> List[dict]:
+        return self.logs.get(kind, [])
+
+    def for_flight(self, kind: str, flight_id: str) -> List[dict]:
+        return self.by_flight.get(kind, {}).get(flight_id, [])
+
+    def for_aircraft(self, kind: str, aircraft_id: str) -> List[dict]:
+        return self.by_aircraft.get(kind, {}).get(aircraft_id, [])
+
+    def flights(self) -> List[str]:
+        """Same result as get_all_flights(), without re-reading the files."""
+        ids = set()
+        for kind in FLIGHT_SOURCES:
+            ids.update(self.by_flight.get(kind, {}))
+        return sorted(ids)
@@ -1,58 +1,103 @@
 """Report generator for aviation operations."""
-from pathlib import Path; import datetime
-BASE = Path(__file__).resolve().parents[1]; OUTPUT = BASE / "output" / "reports"
-
-def write_report(date_str: str, content: str) -> str:
-    """Create the report folder and save a single text file, removing old reports."""
-    OUTPUT.mkdir(parents=True, exist_ok=True)
-    # Clean up all previous report files (txt and pdf)
-    for old_file in OUTPUT.glob("aviation_report_*.*"):
-        old_file.unlink()  # delete old reports
-    # Write the new report
+from pathlib import Path; import datetime; import os
+from typing import Iterable, Iterator, Union
+from modules.rotation import RotatingWriter, compress, prune, rotation_settings
+BASE = Path(__file__).resolve().parents[1]; OUTPUT = Path(os.environ.get("AOPFMAS_REPORTS_DIR", BASE / "output" / "reports"))
+
+def write_report(date_str: str, content: Union[str, Iterable[str]], cfg: dict = None) -> str:
+    """Append a report (text, or an iterable of lines streamed as written) to that day's file.
+
+    Reruns on the same day append to the day's file, which rotates by size;
+    earlier days' reports are kept, gzipped if configured, and pruned by
+    the cfg["output_rotation"] retention policy.
+    """
+    settings = {**rotation_settings(cfg), "daily": False}  # the file name already carries the date
     p = OUTPUT / f"aviation_report_{date_str}.txt"
-    with p.open("w", encoding="utf-8") as f: f.write(content)  # UTF-8 for Windows safety
+    with RotatingWriter(p, settings) as w:  # UTF-8 for Windows safety
+        w.write_block(content.split("\n") if isinstance(content, str) else content, separate=True)
+    # Retention across days: older reports plus this day's rotated parts
+    older = [f for f in OUTPUT.glob("aviation_report_*.txt*") if f != p]
+    if settings["compress"]:
+        older = [compress(f) if f.suffix == ".txt" else f for f in older]
+    prune(older, settings["keep"], settings["keep_days"])
     return str(p)
 
-def generate_report_text(summary: dict, details: list) -> str:
+def generate_report_text(summary: dict, details: list = None) -> str:
     """Compose a clean operations snapshot from aggregated data."""
-    lines=[]; add=lines.append  # tiny helper keeps code short
-    add("Aviation Operations Report"); add("="*60); add(f"Date: {datetime.date.today().isoformat()}"); add("")
-    # At-a-glance numbers for quick triage
+    return "\n".join(iter_report_lines(summary))
+
+def iter_report_lines(summary: dict) -> Iterator[str]:
+    """Report lines, produced section by section so they can be streamed to disk."""
+    for section in (_header, _summary, _delays, _alerts, _crew, _load, _weather, _diversions, _routes, _footer):
+        yield from section(summary)
+
+def _title(name: str) -> Iterator[str]:
+    yield ""; yield f"{name}:"; yield "-"*60
+
+def _header(summary):
+    yield "Aviation Operations Report"; yield "="*60; yield f"Date: {datetime.date.today().isoformat()}"; yield ""
+
+# At-a-glance numbers for quick triage
+def _summary(summary):
     delays=summary.get('predicted_delays',[]) or []; alerts=summary.get('critical_alerts',[]) or []
     crew=summary.get('crew_shortages',[]) or []; diversions=summary.get('route_diversions',[]) or []; avg=summary.get('avg_load_factor')
-    add("SUMMARY:"); add("-"*60)
-    add(f"Total Flights: {summary.get('total_flights',0)}; Delays: {len(delays)}; Alerts: {len(alerts)}")
-    add(f"Crew Shortages: {len(crew)}; Diversions: {len(diversions)}")
-    if avg is not None: add(f"Average Load Factor: {avg*100:.1f}%")
-    # Predicted delays per flight — what to expect
+    yield "SUMMARY:"; yield "-"*60
+    yield f"Total Flights: {summary.get('total_flights',0)}; Delays: {len(delays)}; Alerts: {len(alerts)}"
+    yield f"Crew Shortages: {len(crew)}; Diversions: {len(diversions)}"
+    if avg is not None: yield f"Average Load Factor: {avg*100:.1f}%"
+
+# Predicted delays per flight — what to expect
+def _delays(summary):
+    delays=summary.get('predicted_delays',[]) or []
     if delays:
-        add(""); add("PREDICTED DELAYS:"); add("-"*60)
+        yield from _title("PREDICTED DELAYS")
         for d in delays:
             m=d.get('delay') or d.get('delay_minutes') or 0; r=d.get('reasons',[])
-            add(f"{d.get('flight','Unknown')}: {m} min | Reasons: {', '.join(r) if r else 'None'}")
-    # Critical maintenance/operational alerts — act fast
+            yield f"{d.get('flight','Unknown')}: {m} min | Reasons: {', '.join(r) if r else 'None'}"
+
+# Critical maintenance/operational alerts — act fast
+def _alerts(summary):
+    alerts=summary.get('critical_alerts',[]) or []
     if alerts:
-        add(""); add("CRITICAL ALERTS:"); add("-"*60)
-        for i,a in enumerate(alerts,1): add(f"{i}. {a}")
-    # Crew issues — flag flights needing attention
+        yield from _title("CRITICAL ALERTS")
+        for i,a in enumerate(alerts,1): yield f"{i}. {a}"
+
+# Crew issues — flag flights needing attention
+def _crew(summary):
+    crew=summary.get('crew_shortages',[]) or []
     if crew:
-        add(""); add("CREW ASSIGNMENT:"); add("-"*60)
-        for f in crew: add(f"{f}: CREW SHORTAGE - action needed")
-    # Load factor guidance — quick business read
-    add(""); add("PASSENGER LOAD:"); add("-"*60)
+        yield from _title("CREW ASSIGNMENT")
+        for f in crew: yield f"{f}: CREW SHORTAGE - action needed"
+
+# Load factor guidance — quick business read
+def _load(summary):
+    avg=summary.get('avg_load_factor')
+    yield from _title("PASSENGER LOAD")
     if avg is not None:
-        pct=avg*100; add(f"Average Load Factor: {pct:.1f}%")
-        add("Status: "+("VERY HIGH" if pct>95 else "HIGH" if pct>85 else "MODERATE" if pct>70 else "LOW"))
-    # Weather risks and diversions
+        pct=avg*100; yield f"Average Load Factor: {pct:.1f}%"
+        yield "Status: "+("VERY HIGH" if pct>95 else "HIGH" if pct>85 else "MODERATE" if pct>70 else "LOW")
+
+# Weather risks and diversions
+def _weather(summary):
     wr=summary.get('weather_risks',[]) or []
     if wr:
-        add(""); add("WEATHER RISKS:"); add("-"*60)
-        for i,r in enumerate(wr,1): add(f"{i}. {r}")
+        yield from _title("WEATHER RISKS")
+        for i,r in enumerate(wr,1): yield f"{i}. {r}"
+
+def _diversions(summary):
+    diversions=summary.get('route_diversions',[]) or []
     if diversions:
-        add(""); add("DIVERSION RECOMMENDATIONS:"); add("-"*60)
+        yield from _title("DIVERSION RECOMMENDATIONS")
         for i,d in enumerate(diversions,1):
             alts=", ".join(d.get('suggested_alternates',[])) or "None"
-            add(f"{i}. Flight {d.get('flight_id','Unknown')} | Issue: {d.get('issue','Unknown')} | Alternates: {alts} | +{d.get('extra_time_min',0)} min")
-    # Footer — simple audit trail
-    add(""); add("="*60); add("Report Generated: "+datetime.datetime.now().isoformat()); add("="*60)
-    return "\n".join(lines)
\ No newline at end of file
+            yield f"{i}. Flight {d.get('flight_id','Unknown')} | Issue: {d.get('issue','Unknown')} | Alternates: {alts} | +{d.get('extra_time_min',0)} min"
+
+def _routes(summary):
+    routes=summary.get('popular_routes',{}) or {}
+    if routes:
+        yield from _title("POPULAR ROUTES")
+        for i,(route,n) in enumerate(routes.items(),1): yield f"{i}. {route}: {n} flights"
+
+# Footer — simple audit trail
+def _footer(summary):
+    yield ""; yield "="*60; yield "Report Generated: "+datetime.datetime.now().isoformat(); yield "="*60
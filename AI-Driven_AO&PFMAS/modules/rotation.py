@@ -0,0 +1,180 @@
+"""Buffered, append-only output files with size/date rotation and retention.
+
+Alert logs and reports are appended to, never truncated. A file rotates
+before a write would take it past max_bytes, or on the first write of a
+new day when daily is set: it is renamed <stem>.<day>.<n><suffix>
+(<stem>.<n><suffix> without daily), optionally gzipped, and rotated
+copies beyond the retention policy are deleted (only the newest keep
+are kept; any older than keep_days go too; 0 disables either limit).
+
+Settings come from cfg["output_rotation"]; missing keys use DEFAULTS.
+"""
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import gzip
+import os
+import shutil
+import time
+
+DEFAULTS = {"max_bytes": 10 * 2**20, "daily": True, "compress": False, "keep": 30, "keep_days": 90,
+            "buffer_bytes": 2**16}
+
+def rotation_settings(cfg: Optional[Dict] = None) -> Dict:
+    return {**DEFAULTS, **((cfg or {}).get("output_rotation") or {})}
+
+def compress(path: Path) -> Path:
+    """Gzip path to path.gz, keeping its mtime, and remove the original."""
+    target = path.with_name(path.name + ".gz")
+    with path.open("rb") as src, gzip.open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    shutil.copystat(path, target)  # retention goes by mtime
+    path.unlink()
+    return target
+
+def prune(files: Iterable[Path], keep: int = 0, keep_days: int = 0) -> List[Path]:
+    """Delete all but the newest keep files and any older than keep_days; return the deleted."""
+    files = sorted(files, key=lambda p: (p.stat().st_mtime_ns, p.name), reverse=True)
+    cutoff = time.time() - keep_days * 86400
+    doomed = [p for i, p in enumerate(files)
+              if (keep and i >= keep) or (keep_days and p.stat().st_mtime < cutoff)]
+    for p in doomed:
+        p.unlink()
+    return doomed
+
+def _next_midnight() -> float:
+    return datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).timestamp()
+
+class RotatingWriter:
+    """Append-only text file behind a write buffer, rotated by size and day.
+
+    The file is opened on the first write, so a writer that never writes
+    leaves no file behind. Sizes count characters, which equals bytes for
+    the ASCII alert and report text.
+    """
+
+    def __init__(self, path: Path, settings: Optional[Dict] = None):
+        self.path = Path(path)
+        self.settings = settings or rotation_settings()
+        self.max_bytes, self.daily = self.settings["max_bytes"], self.settings["daily"]
+        self.file = None
+        self.size = 0
+        self._midnight = 0.0
+
+    def _due(self, incoming: int) -> bool:
+        return bool(self.size) and ((self.max_bytes and self.size + incoming > self.max_bytes)
+                                    or (self.daily and time.time() >= self._midnight))
+
+    def _open(self, incoming: int) -> None:
+        if self.path.exists():
+            st = self.path.stat()
+            self.size = st.st_size
+            self._midnight = datetime.combine(date.fromtimestamp(st.st_mtime) + timedelta(days=1),
+                                              datetime.min.time()).timestamp()
+            if self._due(incoming):
+                self.rotate()
+        else:
+            self.size = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        needs_newline = False
+        if self.size:  # keep appended lines off a last line that lacks its newline
+            with self.path.open("rb") as f:
+                f.seek(-1, 2)
+                needs_newline = f.read(1) != b"\n"
+        self.file = self.path.open("a", encoding="utf-8", buffering=self.settings["buffer_bytes"])
+        self._midnight = _next_midnight()
+        if needs_newline:
+            self.file.write("\n")
+            self.size += 1
+
+    def _ready(self, incoming: int) -> None:
+        if self.file is None:
+            self._open(incoming)
+        elif self._due(incoming):
+            self.rotate()
+            self._open(incoming)
+
+    def write(self, text: str) -> None:
+        """Append text; the file may rotate before it (never inside it)."""
+        self._ready(len(text))
+        self.file.write(text)
+        self.size += len(text)
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """Append lines, each with a newline; the file may rotate between lines.
+
+        Same result as write() per line, but runs of lines that fit before
+        the next rotation go out as one write. Used for alert logs.
+        """
+        self._ready(0)
+        lines = lines if isinstance(lines, list) else list(lines)
+        text = "\n".join(lines) + "\n" if lines else ""
+        if not self.max_bytes or self.size + len(text) <= self.max_bytes:  # no rotation due inside: one write
+            if text:
+                self.write(text)
+            return
+        batch, size = [], 0
+        for line in lines:
+            text = line + "\n"
+            if batch and self.max_bytes and self.size + size + len(text) > self.max_bytes:
+                self.write("".join(batch))
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text)
+        if batch:
+            self.write("".join(batch))
+
+    def write_block(self, lines: Iterable[str], separate: bool = False) -> None:
+        """Append lines as one block, each with a newline; the file never rotates inside it.
+
+        Unlike write_lines, a block may take the file past max_bytes: a
+        report stays in one file. Lines are consumed lazily, so a generator's
+        output is never held in memory. With separate, a blank line goes
+        first if the file has content.
+        """
+        self._ready(0)
+        write, size = self.file.write, 0
+        if separate and self.size:
+            write("\n")
+            size += 1
+        for line in lines:
+            write(line)
+            write("\n")
+            size += len(line) + 1
+        self.size += size
+
+    def rotated(self) -> List[Path]:
+        """Rotated copies of this file, gzipped or not."""
+        return [p for p in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}*") if p != self.path]
+
+    def rotate(self) -> Optional[Path]:
+        """Move the current file aside now, then apply compression and retention."""
+        self.close()
+        if not self.path.exists() or not self.path.stat().st_size:
+            return None
+        stem, suffix = self.path.stem, self.path.suffix
+        prefix = f"{stem}.{date.fromtimestamp(self.path.stat().st_mtime).isoformat()}" if self.daily else stem
+        taken = [p.name[len(prefix) + 1:].split(".", 1)[0] for p in self.path.parent.glob(f"{prefix}.*{suffix}*")]
+        n = max((int(t) for t in taken if t.isdigit()), default=0) + 1  # never reuse a pruned number
+        target = self.path.with_name(f"{prefix}.{n}{suffix}")
+        os.replace(self.path, target)
+        if self.settings["compress"]:
+            target = compress(target)
+        prune(self.rotated(), self.settings["keep"], self.settings["keep_days"])
+        self.size = 0
+        return target
+
+    def flush(self) -> None:
+        if self.file:
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> "RotatingWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
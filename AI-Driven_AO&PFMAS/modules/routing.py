@@ -0,0 +1,129 @@
+"""Airport graph, precomputed diversion alternates and weather-aware ranking.
+
+The graph joins each airport to its configured alternate_airports and to
+every route observed in the logs (origin/destination fields, or the
+airports a flight's weather readings move through). Alternates are the
+nearest airports by shortest path, computed once per airport when the
+table is built. Edges cost one hop unless cfg["route_minutes"] gives
+flight times such as {"DEL-BOM": 110}; then every edge costs minutes, and
+routes it does not list cost cfg["default_route_minutes"] (60).
+
+Ranking uses an index of the latest weather per airport: alternates with
+risky weather (any weather rule in the config) go last, and readings that
+trip a rule in the "diversion" group get a diversion. Rankings are cached per destination, so
+diversions for thousands of weather events are dictionary lookups.
+"""
+from collections import Counter
+from heapq import heappop, heappush
+from typing import Dict, Iterable, List, Optional, Tuple
+from modules.detectors import by_time
+from modules.rules import compile_rules
+
+def weather_risk(w: Dict, cfg: Dict) -> bool:
+    """True if the reading trips any weather rule in cfg["rules"]."""
+    return compile_rules(cfg).matches("weather")(w)
+
+def needs_diversion(w: Dict, cfg: Dict) -> bool:
+    """True if the reading trips a weather rule in the "diversion" group."""
+    return compile_rules(cfg).matches("weather", "diversion")(w)
+
+ROUTE_FIELDS = ("flight_id", "timestamp", "origin", "destination", "airport")  # all observed_routes reads
+
+def observed_routes(*logs: Iterable[Dict]) -> Counter:
+    """Flights per (origin, destination) route seen in the logs."""
+    legs, stops = {}, {}  # dicts keep first-seen order, so graph ties break the same way every run
+    for records in logs:
+        for r in records:
+            fid = r.get("flight_id")
+            if r.get("origin") and r.get("destination"):
+                legs[fid, r["origin"], r["destination"]] = None
+            elif r.get("airport"):
+                stops.setdefault(fid, []).append({"timestamp": r.get("timestamp"), "airport": r["airport"]})
+    for fid, readings in stops.items():
+        airports = [r["airport"] for r in by_time(readings)]
+        legs.update(dict.fromkeys((fid, a, b) for a, b in zip(airports, airports[1:]) if a != b))
+    return Counter((a, b) for _, a, b in legs)
+
+class RoutingTable:
+    """Shortest-path alternates for every airport, ranked against current weather."""
+
+    def __init__(self, cfg: Dict, routes: Optional[Counter] = None):
+        self.cfg = cfg
+        self.routes = routes or Counter()
+        self.minutes = cfg.get("route_minutes", {})
+        self.default_cost = cfg.get("default_route_minutes", 60) if self.minutes else 1
+        self.graph: Dict[str, Dict[str, float]] = {a: {} for a in cfg.get("airports", [])}
+        for dest, alternates in cfg.get("alternate_airports", {}).items():
+            for alt in alternates:
+                self._link(dest, alt)
+        for a, b in self.routes:
+            self._link(a, b)
+        limit = cfg.get("max_alternates", 3)
+        self.alternates = {a: self._nearest(a, limit) for a in self.graph}
+        self.weather: Dict[str, Dict] = {}
+        self._ranked: Dict[str, List[Tuple[str, float]]] = {}
+
+    @classmethod
+    def from_logs(cls, cfg: Dict, *logs: Iterable[Dict]) -> "RoutingTable":
+        return cls(cfg, observed_routes(*logs))
+
+    def _link(self, a: str, b: str) -> None:
+        cost = self.minutes.get(f"{a}-{b}") or self.minutes.get(f"{b}-{a}") or self.default_cost
+        for x, y in ((a, b), (b, a)):
+            edges = self.graph.setdefault(x, {})
+            edges[y] = min(edges.get(y, cost), cost)
+
+    def _nearest(self, source: str, limit: int) -> List[Tuple[str, float]]:
+        """Dijkstra from source; ties keep edge insertion order (configured alternates first)."""
+        dist, seq, heap, found = {source: 0}, 0, [(0, 0, source)], []
+        while heap and len(found) < limit:
+            d, _, node = heappop(heap)
+            if d > dist.get(node, float("inf")):
+                continue
+            if node != source:
+                found.append((node, d))
+            for nxt, cost in self.graph[node].items():
+                if d + cost < dist.get(nxt, float("inf")):
+                    dist[nxt] = d + cost
+                    seq += 1
+                    heappush(heap, (d + cost, seq, nxt))
+        return found
+
+    def observe_weather(self, weather_logs: Iterable[Dict]) -> None:
+        """Index the latest reading per airport; clears cached rankings."""
+        for w in weather_logs:
+            airport = w.get("airport")
+            if airport and str(w.get("timestamp", "")) >= str(self.weather.get(airport, {}).get("timestamp", "")):
+                self.weather[airport] = w
+        self._ranked.clear()
+
+    def ranked_alternates(self, dest: str) -> List[Tuple[str, float]]:
+        """(alternate, path cost) nearest first, with bad-weather airports moved last."""
+        if dest not in self._ranked:
+            bad = {a for a, w in self.weather.items() if weather_risk(w, self.cfg)}
+            self._ranked[dest] = sorted(self.alternates.get(dest, []), key=lambda alt: alt[0] in bad)
+        return self._ranked[dest]
+
+    def diversion(self, log: Dict) -> Optional[Dict]:
+        """Diversion for one weather reading, or None if weather is fine."""
+        if not needs_diversion(log, self.cfg):
+            return None
+        ranked = self.ranked_alternates(log.get("destination") or log.get("airport") or "DEL")
+        alternates = [a for a, _ in ranked]
+        if self.minutes and ranked:
+            extra = 30 + ranked[0][1]  # approach allowance plus flight time to the best alternate
+        else:
+            extra = 30 + (10 * len(alternates))
+        return {
+            "flight_id": log.get("flight_id"),
+            "issue": "Bad weather on route",
+            "suggested_alternates": alternates,
+            "extra_time_min": extra
+        }
+
+    def diversions(self, weather_logs: Iterable[Dict]) -> List[Dict]:
+        return [d for d in map(self.diversion, weather_logs) if d]
+
+    def popular_routes(self, top: int = 5) -> Dict[str, int]:
+        """Most flown routes as {"ORIG-DEST": flights}."""
+        return {f"{a}-{b}": n for (a, b), n in self.routes.most_common(top)}
@@ -0,0 +1,361 @@
+"""Threshold rules, compiled once into fast evaluators.
+
+The rules are DEFAULT_RULES below unless the config gives its own "rules"
+list, which replaces them. A rule reads one log ("weather", "engine", "altitude" or "cabin") and
+holds when all its clauses do (any of them with "match": "any"):
+
+    {"field": "vibration", "op": ">", "threshold": "engine_vibration_threshold"}
+
+threshold is a number or the name of a config key. default is used when
+a record lacks the field (0 unless given). "scale_by" multiplies the
+threshold by another field (default "scale_default"), and "measure"
+compares the "pct_deviation" from the "of" field or the "swing" from the
+flight's previous reading (op ">" only) instead of the raw value.
+Ops: > >= < <= == != truthy.
+
+A matching rule raises an alert, adds a delay, or both, and may belong
+to named groups that other modules test records against:
+
+    "alert":  {"name", "severity": "critical" | "warning", "message", "log", "defaults"}
+    "delay":  {"reason", "minutes", "once_per_flight"}
+    "window": {"count", "minutes"}    alert on N matches per aircraft within M minutes
+    "groups": ["diversion"]           routing diverts on weather matching this group
+
+message (console) and log (alert log line) are str.format templates over
+record fields, with + - * / allowed: "{expected_thrust - engine_thrust:.1f}".
+Missing fields format as None unless the alert's defaults give a value;
+{threshold} is the first clause's threshold and {count} a window's count.
+Alerts apply to the engine, altitude and cabin logs only, grouped per rule
+in list order; a flight's delay reasons follow log order, then list order.
+Rules on unknown logs, weather alerts and rules that do nothing raise
+ValueError.
+
+compile_rules() turns every log's rules into one generated Python function
+with thresholds bound as closure constants; columnar builds NumPy masks
+from the same Rule objects, so every run mode applies identical rules.
+"""
+from datetime import timedelta
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Tuple
+import ast
+from modules.detectors import SwingDetector, WindowCounter, by_time, parse_ts, record_key
+
+DELAY_KINDS = ("weather", "engine", "altitude", "cabin")  # delay reasons are reported in this log order
+ALERT_KINDS = ("engine", "altitude", "cabin")
+OPS = (">", ">=", "<", "<=", "==", "!=", "truthy")
+MEASURES = ("value", "pct_deviation", "swing")
+
+# Fallbacks for threshold keys missing from the config
+PARAM_DEFAULTS = {
+    "crosswind_threshold_knots": 40, "visibility_threshold_m": 1500, "engine_thrust_deviation_pct": 20,
+    "engine_vibration_threshold": 5.0, "turbulence_moderate_level": 4.0, "turbulence_repeat_count": 2,
+    "turbulence_repeat_window_min": 60, "high_cabin_temp_c": 30, "cabin_pressure_drop_threshold": 500,
+    "rapid_altitude_floor_m": 1500, "fuel_burn_threshold": 2600, "fuel_thrust_ratio": 0.85,
+    "cabin_altitude_limit_ft": 8000, "cabin_pressure_swing_threshold": 300,
+}
+
+# Used when the config has no "rules" list. Thresholds still come from the config
+# keys they name, or from PARAM_DEFAULTS when those are missing too.
+DEFAULT_RULES = [
+    {"log": "engine", "when": [{"field": "engine_thrust", "measure": "pct_deviation", "of": "expected_thrust",
+                                "op": ">", "threshold": "engine_thrust_deviation_pct"}],
+     "delay": {"reason": "Engine thrust deviation", "minutes": 50}},
+    {"log": "engine", "when": [{"field": "vibration", "op": ">", "threshold": "engine_vibration_threshold"}],
+     "alert": {"name": "HIGH_VIBRATION", "severity": "critical",
+               "message": "{timestamp} {flight_id} HIGH_VIBRATION vibration={vibration}",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: HIGH_VIBRATION, vibration: {vibration}, threshold: {threshold}"},
+     "delay": {"reason": "High engine vibration", "minutes": 40}},
+    {"log": "altitude", "when": [{"field": "altitude", "op": "<", "threshold": "rapid_altitude_floor_m"},
+                                 {"field": "turbulence", "op": ">", "threshold": "turbulence_moderate_level"}],
+     "alert": {"name": "RAPID_ALTITUDE_FLUCT", "severity": "critical",
+               "message": "{timestamp} {flight_id} RAPID_ALTITUDE_FLUCT altitude={altitude} turbulence={turbulence}",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: RAPID_ALTITUDE_FLUCT, altitude: {altitude}m, turbulence: {turbulence}"}},
+    {"log": "altitude", "when": [{"field": "turbulence", "op": ">", "threshold": "turbulence_moderate_level"}],
+     "window": {"count": "turbulence_repeat_count", "minutes": "turbulence_repeat_window_min"},
+     "alert": {"name": "REPEATED_TURBULENCE", "severity": "warning",
+               "message": "{timestamp} {flight_id} REPEATED_TURBULENCE count={count}",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: REPEATED_TURBULENCE, occurrences: {count}"}},
+    {"log": "engine", "when": [{"field": "engine_thrust", "default": 100, "op": "<", "threshold": "fuel_thrust_ratio",
+                                "scale_by": "expected_thrust", "scale_default": 100},
+                               {"field": "fuel_burn", "op": ">", "threshold": "fuel_burn_threshold"}],
+     "alert": {"name": "ABNORMAL_FUEL_BURN", "severity": "critical", "defaults": {"expected_thrust": 100, "engine_thrust": 100},
+               "message": "{timestamp} {flight_id} ABNORMAL_FUEL_BURN fuel_burn={fuel_burn} thrust_deviation={expected_thrust - engine_thrust:.1f}%",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: ABNORMAL_FUEL_BURN, fuel_burn: {fuel_burn}, thrust_deviation: {expected_thrust - engine_thrust:.1f}%"}},
+    {"log": "cabin", "when": [{"field": "cabin_temperature", "op": ">", "threshold": "high_cabin_temp_c"}],
+     "alert": {"name": "HIGH_CABIN_TEMP", "severity": "warning",
+               "message": "{timestamp} {flight_id} HIGH_CABIN_TEMP temperature={cabin_temperature}",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: HIGH_CABIN_TEMP, temperature: {cabin_temperature}C, limit: {threshold}C"}},
+    {"log": "cabin", "match": "any", "when": [{"field": "cabin_altitude", "op": ">", "threshold": "cabin_altitude_limit_ft"},
+                                              {"field": "pressure_rate_change", "op": ">", "threshold": "cabin_pressure_drop_threshold"}],
+     "alert": {"name": "HIGH_CABIN_PRESSURE", "severity": "warning", "defaults": {"cabin_altitude": 0, "pressure_rate_change": 0},
+               "message": "{timestamp} {flight_id} HIGH_CABIN_PRESSURE cabin_altitude={cabin_altitude} pressure_rate={pressure_rate_change}",
+               "log": "timestamp: {timestamp}, flight: {flight_id}, alert: HIGH_CABIN_PRESSURE, cabin_altitude: {cabin_altitude}ft, pressure_rate: {pressure_rate_change}ft/min"}},
+    {"log": "weather", "when": [{"field": "crosswind", "op": ">", "threshold": "crosswind_threshold_knots"}],
+     "delay": {"reason": "High crosswind", "minutes": 30}},
+    {"log": "weather", "when": [{"field": "thunderstorm", "default": False, "op": "truthy"}],
+     "delay": {"reason": "Thunderstorm reported", "minutes": 60}, "groups": ["diversion"]},
+    {"log": "weather", "when": [{"field": "visibility", "default": 999999, "op": "<", "threshold": "visibility_threshold_m"}],
+     "delay": {"reason": "Low visibility", "minutes": 45}, "groups": ["diversion"]},
+    {"log": "altitude", "when": [{"field": "turbulence", "op": ">=", "threshold": "turbulence_moderate_level"}],
+     "delay": {"reason": "Turbulence advisory", "minutes": 15, "once_per_flight": True}},
+    {"log": "cabin", "when": [{"field": "pressure_rate_change", "op": ">", "threshold": "cabin_pressure_drop_threshold"}],
+     "delay": {"reason": "Sudden cabin pressure drop", "minutes": 35}},
+    {"log": "cabin", "when": [{"field": "cabin_pressure", "measure": "swing", "op": ">", "threshold": "cabin_pressure_swing_threshold"}],
+     "delay": {"reason": "Rapid cabin pressure change", "minutes": 25}},
+]
+
+
+def _param(value, cfg: Dict, rule: str):
+    """A number as given, or the config value it names."""
+    if not isinstance(value, str):
+        return value
+    if value in cfg:
+        return cfg[value]
+    if value in PARAM_DEFAULTS:
+        return PARAM_DEFAULTS[value]
+    raise ValueError(f"rule {rule}: unknown config key {value!r}")
+
+class Clause:
+    """One normalized condition; thresholds are already resolved from the config."""
+
+    __slots__ = ("field", "op", "threshold", "default", "measure", "of", "of_default", "scale_by", "scale_default")
+
+    def __init__(self, spec: Dict, cfg: Dict, rule: str):
+        self.field, self.op = spec["field"], spec.get("op", ">")
+        self.measure = spec.get("measure", "value")
+        if self.op not in OPS or self.measure not in MEASURES:
+            raise ValueError(f"rule {rule}: unsupported op {self.op!r} or measure {self.measure!r}")
+        if self.measure == "swing" and self.op != ">":
+            raise ValueError(f"rule {rule}: swing clauses only support '>'")
+        self.threshold = _param(spec.get("threshold"), cfg, rule)
+        self.default = spec.get("default", 0)
+        self.of, self.of_default = spec.get("of"), spec.get("of_default")
+        self.scale_by, self.scale_default = spec.get("scale_by"), spec.get("scale_default", 0)
+
+_BINOPS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+
+def _formatter(texts: List[str], defaults: Dict, rule: str, threshold=None, critical: bool = False) -> Callable:
+    """Compile templates into one f-string function of (record, count) returning (*texts, critical).
+
+    The function's fields attribute lists the record fields it reads.
+    """
+    names: Dict[str, object] = {"threshold": threshold, "critical": critical}
+    def bind(value) -> str:  # keeps quotes out of the f-string expressions
+        names[f"k{len(names)}"] = value
+        return f"k{len(names) - 1}"
+    fields: Dict[str, None] = {}
+    def expr(node) -> str:
+        if isinstance(node, ast.Name):
+            if node.id in ("count", "threshold"):
+                return node.id
+            fields[node.id] = None
+            return f"r.get({bind(node.id)}, {bind(defaults[node.id])})" if node.id in defaults else f"r.get({bind(node.id)})"
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return repr(node.value)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            return f"({expr(node.left)} {_BINOPS[type(node.op)]} {expr(node.right)})"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return f"(-{expr(node.operand)})"
+        raise ValueError(f"rule {rule}: unsupported template expression {ast.unparse(node)!r}")
+
+    def fstring(text: str) -> str:
+        body = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            body.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is not None:
+                if "{" in spec:
+                    raise ValueError(f"rule {rule}: nested fields in format spec {spec!r}")
+                value = expr(ast.parse(field.strip(), mode="eval").body)
+                body.append("{" + value + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+        return f"f{''.join(body)!r}"
+
+    source = f"lambda r, count=None: ({', '.join(map(fstring, texts))}, critical)"
+    fmt = eval(compile(source, f"<template {rule}>", "eval"), names)
+    fmt.fields = tuple(fields)  # the record fields the templates read
+    return fmt
+
+class Rule:
+    """One rule from the config, with its templates compiled."""
+
+    def __init__(self, spec: Dict, cfg: Dict, index: int):
+        if not isinstance(spec, dict):
+            raise ValueError(f"rule {index}: expected an object, got {spec!r}")
+        alert, delay, window = spec.get("alert"), spec.get("delay"), spec.get("window")
+        self.name = (alert or {}).get("name") or (delay or {}).get("reason") or f"rule {index}"
+        self.log = spec.get("log")
+        if self.log not in DELAY_KINDS:
+            raise ValueError(f"rule {self.name}: unknown log {self.log!r}, expected one of {', '.join(DELAY_KINDS)}")
+        if alert and self.log not in ALERT_KINDS:
+            raise ValueError(f"rule {self.name}: alerts are not raised on the {self.log} log")
+        if window and not alert:
+            raise ValueError(f"rule {self.name}: a window needs an alert")
+        self.groups = spec.get("groups", [])
+        if not isinstance(self.groups, list) or not all(isinstance(g, str) for g in self.groups):
+            raise ValueError(f"rule {self.name}: groups must be a list of names")
+        if not (alert or delay or self.groups):
+            raise ValueError(f"rule {self.name}: raises no alert or delay and is in no group")
+        self.clauses = [Clause(c, cfg, self.name) for c in spec.get("when", [])]
+        self.any = spec.get("match", "all") == "any"
+        self.threshold = self.clauses[0].threshold if self.clauses else None
+        self.alert = bool(alert)
+        if alert:
+            self.critical = alert.get("severity") == "critical"
+            # format(r, count=None) -> (console alert, log line, is_critical) for a record that tripped the rule
+            self.format = _formatter([alert.get("message", "{timestamp} {flight_id} " + self.name),
+                                      alert.get("log", "timestamp: {timestamp}, flight: {flight_id}, alert: " + self.name)],
+                                     alert.get("defaults", {}), self.name,
+                                     threshold=self.threshold, critical=self.critical)
+        self.delay = bool(delay)
+        if delay:
+            self.hit = (delay["reason"], delay.get("minutes", 0))
+            self.once = bool(delay.get("once_per_flight"))
+        self.window = window and (_param(window.get("count", 2), cfg, self.name),
+                                  timedelta(minutes=_param(window.get("minutes", 60), cfg, self.name)))
+        # Record fields needed to raise this rule's alerts
+        self.fields = (self.format.fields if alert else ()) + (("timestamp", "aircraft_id", "flight_id") if window else ())
+
+    def window_counter(self) -> WindowCounter:
+        return WindowCounter(*self.window)
+
+    def replay(self, matched: List[Dict]) -> list:
+        """Window alerts for every record that matched, replayed in time order."""
+        detector, found = self.window_counter(), []
+        for r in by_time(matched):
+            cnt = detector.add(record_key(r), parse_ts(r.get("timestamp")))
+            if cnt:
+                found.append(self.format(r, cnt))
+        return found
+
+def _condition(rule: Rule, i: int, const, setup: List[str], body: List[str]) -> str:
+    """Python source of rule i's condition; swing updates go into body so they run for every record."""
+    terms = []
+    for k, c in enumerate(rule.clauses):
+        n = f"{i}_{k}"  # unique suffix for generated names
+        value = f"r.get({c.field!r}, {const(c.default)})"
+        if c.measure == "swing":
+            setup.append(f"swing{n} = SwingDetector({const(c.threshold)})")
+            body.append(f"s{n} = swing{n}.update(r.get('flight_id'), parse_ts(r.get('timestamp')), {value})")
+            terms.append(f"s{n}")
+        elif c.op == "truthy":
+            terms.append(value)
+        elif c.measure == "pct_deviation":
+            terms.append(f"(ref{n} := r.get({c.of!r}, {const(c.of_default)})) and "
+                         f"abs({value} - ref{n}) / ref{n} * 100 {c.op} {const(c.threshold)}")
+        elif c.scale_by:
+            terms.append(f"{value} {c.op} r.get({c.scale_by!r}, {const(c.scale_default)}) * {const(c.threshold)}")
+        else:
+            terms.append(f"{value} {c.op} {const(c.threshold)}")
+    return f" {'or' if rule.any else 'and'} ".join(f"({t})" for t in terms) or "True"
+
+def _checker(rules: List[Rule], name: str, delays: bool) -> Callable[[], Callable[[Dict], list]]:
+    """Generate one function testing rules in order.
+
+    The checker returns a tuple with the (reason, minutes) of each delay
+    rule that hit, or else the index in rules of each alert rule that did;
+    most records trip nothing and get the shared empty tuple.
+    once_per_flight delay rules hit at most once per flight. Returns a
+    factory: each call gives a checker with fresh state (swing detectors,
+    flights already hit); its `detectors` attribute holds the swing
+    detectors and its reset() clears that state.
+    """
+    consts: list = []
+    def const(value) -> str:
+        consts.append(value)
+        return f"c{len(consts) - 1}"
+    setup, body = [], []
+    for i, rule in enumerate(rules):
+        cond = _condition(rule, i, const, setup, body)
+        hit = const(rule.hit) if delays else str(i)
+        if delays and rule.once:
+            setup.append(f"seen{i} = set()")
+            body += [f"if ({cond}) and (fid := r.get('flight_id')) not in seen{i}:", f"    seen{i}.add(fid)",
+                     f"    out += ({hit},)"]
+        else:
+            body += [f"if {cond}:", f"    out += ({hit},)"]
+    lines = ["def make(C, parse_ts, SwingDetector):"]
+    lines += [f"    c{j} = C[{j}]" for j in range(len(consts))]
+    lines += [f"    {s}" for s in setup]
+    lines += ["    def check(r):", "        out = ()"]
+    lines += [f"        {s}" for s in body]
+    detectors = [s.split(" = ")[0] for s in setup if s.startswith("swing")]
+    state = [s.split(" = ")[0] for s in setup if s.startswith("seen")]
+    lines += ["        return out", "    def reset():"]
+    lines += [f"        {d}.last.clear()" for d in detectors] + [f"        {v}.clear()" for v in state] + ["        pass"]
+    lines += [f"    check.detectors = ({''.join(d + ', ' for d in detectors)})", "    check.reset = reset", "    return check"]
+    namespace: Dict = {}
+    exec(compile("\n".join(lines), f"<rules {name}>", "exec"), namespace)
+    make, consts = namespace["make"], tuple(consts)
+    return lambda: make(consts, parse_ts, SwingDetector)
+
+class RuleSet:
+    """Compiled alert and delay rules for one config."""
+
+    def __init__(self, cfg: Dict):
+        specs = cfg.get("rules", DEFAULT_RULES)
+        if not isinstance(specs, list):
+            raise ValueError(f"config \"rules\" must be a list, got {type(specs).__name__}")
+        self.rules = [Rule(spec, cfg, i) for i, spec in enumerate(specs)]
+        self.alerts = [r for r in self.rules if r.alert]
+        self._alert_checks = {kind: _checker(self.alert_rules(kind), f"{kind} alerts", delays=False) for kind in ALERT_KINDS}
+        self._delay_checks = {kind: _checker(self.delay_rules(kind), f"{kind} delays", delays=True) for kind in DELAY_KINDS}
+        self._flight_checks = {kind: make() for kind, make in self._delay_checks.items()}
+        self._swings = {kind for kind in DELAY_KINDS
+                        if any(c.measure == "swing" for r in self.delay_rules(kind) for c in r.clauses)}
+        self._matchers: Dict[Tuple[str, Optional[str]], Callable[[Dict], bool]] = {}
+
+    def alert_rules(self, kind: str) -> List[Rule]:
+        return [r for r in self.alerts if r.log == kind]
+
+    def delay_rules(self, kind: str) -> List[Rule]:
+        return [r for r in self.rules if r.delay and r.log == kind]
+
+    def time_ordered(self, kind: str) -> bool:
+        """True if a delay rule on this log compares consecutive readings, so records must be in time order."""
+        return kind in self._swings
+
+    def alert_check(self, kind: str) -> Callable[[Dict], Tuple[int, ...]]:
+        """Fresh checker returning the indices into alert_rules(kind) of the rules a record trips."""
+        make = self._alert_checks.get(kind)
+        return make() if make else (lambda r: ())
+
+    def delay_check(self, kind: str) -> Callable[[Dict], Tuple[Tuple[str, int], ...]]:
+        """Fresh checker returning the (reason, minutes) delay hits of a record."""
+        make = self._delay_checks.get(kind)
+        return make() if make else (lambda r: ())
+
+    def flight_delay_check(self, kind: str) -> Callable[[Dict], Tuple[Tuple[str, int], ...]]:
+        """delay_check for one flight's records: one checker per log, reset on every call.
+
+        Only one flight can be evaluated at a time per RuleSet.
+        """
+        check = self._flight_checks[kind]
+        check.reset()
+        return check
+
+    def matches(self, kind: str, group: Optional[str] = None) -> Callable[[Dict], bool]:
+        """Predicate: does a record trip any rule on this log (in group, if given)?
+
+        Built once per log and group; swing clauses in it keep their state
+        across calls.
+        """
+        key = (kind, group)
+        if key not in self._matchers:
+            rules = [r for r in self.rules if r.log == kind and (group is None or group in r.groups)]
+            check = _checker(rules, f"{kind} {group or 'any'} match", delays=False)()
+            self._matchers[key] = lambda r: bool(check(r))
+        return self._matchers[key]
+
+_compiled: Dict[int, Tuple[Dict, RuleSet]] = {}
+
+def compile_rules(cfg: Dict) -> RuleSet:
+    """RuleSet for cfg, compiled on first use and reused while the same cfg dict is passed.
+
+    Changes made to that dict afterwards are not seen; load_config() hands
+    out a new dict when airline_config.json changes.
+    """
+    entry = _compiled.get(id(cfg))
+    if entry is None or entry[0] is not cfg:
+        if len(_compiled) >= 8:
+            _compiled.clear()
+        entry = _compiled[id(cfg)] = (cfg, RuleSet(cfg))
+    return entry[1]
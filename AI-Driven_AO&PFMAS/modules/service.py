@@ -0,0 +1,145 @@
+"""Long-running monitoring service with live telemetry ingestion.
+
+Tails the engine, altitude and cabin logs in data/ and, optionally, a
+local TCP socket that accepts one JSON record per line (with a "kind"
+field of engine/altitude/cabin). Every record goes through the health
+rules as it arrives, new alerts are appended to the alert logs, and the
+dashboard is refreshed on an interval.
+
+Data files should be newline-delimited JSON, which is read from the last
+offset. A file that is a JSON array is re-read whole on every change, so
+alert latency grows with its size and passes a second at about 200k
+records.
+"""
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import json
+from modules.log_processor import DATA_DIR, LOG_FILES, iter_json
+from modules.health_monitor import AlertAppender, HealthStream, load_config
+from modules.dashboard import render_dashboard
+
+MONITORED = ("engine", "altitude", "cabin")
+
+class _Tail:
+    """Follows one data file: NDJSON by byte offset, JSON arrays by record count.
+
+    Arrays have to be re-read whole on every change, so prefer NDJSON for
+    files that are appended to continuously.
+    """
+
+    def __init__(self, path: Path, from_start: bool):
+        self.path, self.offset, self.seen, self.stamp = path, 0, 0, None
+        self.rejected = 0  # NDJSON lines that were not valid JSON
+        if not from_start:
+            self.poll()  # skip what is already on disk
+
+    def poll(self) -> List[dict]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return []
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self.stamp:
+            return []
+        self.stamp = stamp
+        with self.path.open("rb") as f:
+            is_array = f.read(64).lstrip().startswith(b"[")
+        if is_array:
+            records = list(iter_json(self.path))
+            new = records[self.seen:]
+            self.seen = len(records)  # a shorter file means it was rewritten: resync silently
+            return new
+        if st.st_size < self.offset:  # truncated or replaced
+            self.offset = 0
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # leave a partially written last line for the next poll
+        self.offset += end
+        records = []
+        for line in data[:end].splitlines():
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    self.rejected += 1
+        return records
+
+class MonitoringService:
+    """Feeds live records through HealthStream and appends alerts as they fire."""
+
+    def __init__(self, cfg: Optional[Dict] = None, data_dir: Path = DATA_DIR, poll_interval: float = 0.5,
+                 dashboard_interval: float = 30.0, from_start: bool = False, recent: int = 20):
+        self.cfg = load_config() if cfg is None else cfg
+        self.rules = HealthStream(self.cfg)
+        self.tails = {kind: _Tail(data_dir / LOG_FILES[kind], from_start) for kind in MONITORED}
+        self.poll_interval, self.dashboard_interval = poll_interval, dashboard_interval
+        self.recent = deque(maxlen=recent)  # latest alerts shown on the dashboard
+        self.flights = set()
+        self.records = self.alerts = self.rejected = 0
+        self.appender: Optional[AlertAppender] = None
+        self._clients = set()
+
+    def ingest(self, kind: str, records: List[dict]) -> None:
+        for r in records:
+            self.records += 1
+            self.flights.add(r.get("flight_id"))
+            found = self.rules.feed(kind, r)
+            if found:
+                self.appender.write(found)
+                self.recent.extend(alert for alert, _, _ in found)
+                self.alerts += len(found)
+        if records:
+            self.appender.flush()
+
+    def summary(self) -> Dict:
+        return {"total_flights": len(self.flights), "critical_alerts": list(self.recent)}
+
+    async def _tail_loop(self):
+        while True:
+            for kind, tail in self.tails.items():
+                self.ingest(kind, tail.poll())
+            await asyncio.sleep(self.poll_interval)
+
+    async def _dashboard_loop(self):
+        while True:
+            await asyncio.sleep(self.dashboard_interval)
+            render_dashboard(self.summary())
+            rejected = self.rejected + sum(t.rejected for t in self.tails.values())
+            print(f"Records: {self.records}; alerts: {self.alerts}; rejected: {rejected}; late: {self.rules.late}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while line := await reader.readline():
+                try:
+                    record = json.loads(line)
+                    kind = record.pop("kind")
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    self.rejected += 1
+                    continue
+                if kind in MONITORED:
+                    self.ingest(kind, [record])
+                else:
+                    self.rejected += 1
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: Optional[int] = None):
+        """Run until cancelled; listen on host:port as well if a port is given."""
+        self.appender = AlertAppender(cfg=self.cfg)
+        server = await asyncio.start_server(self._handle, host, port) if port else None
+        try:
+            await asyncio.gather(self._tail_loop(), self._dashboard_loop())
+        finally:
+            if server:
+                server.close()
+            for writer in list(self._clients):
+                writer.close()  # clients see EOF and their handlers return
+            await asyncio.sleep(0)
+            self.appender.close()
@@ -0,0 +1,101 @@
+"""Shared fixtures: random telemetry, a private alert log directory and a pipeline sandbox."""
+from datetime import date, datetime
+from pathlib import Path
+from types import SimpleNamespace
+import json
+import random
+import sys
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from modules import binary_cache, crew_optimizer, health_monitor, incremental, log_processor, reporter
+
+# Field values straddle the default thresholds, so every rule both hits and misses
+FIELDS = {
+    "engine": {"engine_thrust": [0, 70, 85.5, 100, 120], "expected_thrust": [0, 100, 90.0],
+               "vibration": [4, 5.0, 5.1, 7], "fuel_burn": [2500, 2600, 2601, 2800]},
+    "altitude": {"altitude": [1000, 1500, 1499.5, 9000], "turbulence": [3, 4.0, 4, 4.5, 6]},
+    "cabin": {"cabin_pressure": [0, 7500, 7800, 7801, 8200], "cabin_temperature": [25, 30, 31],
+              "cabin_altitude": [7000, 8000, 8001], "pressure_rate_change": [400, 500, 501]},
+    "weather": {"crosswind": [10, 40, 41], "thunderstorm": [True, False, 0, 1], "visibility": [1000, 1500, 1499, 8000]},
+}
+FLIGHTS = ["A1", "B2", "C3", "D4"]
+
+def random_logs(seed: int, n: int = 60, ordered: bool = False) -> dict:
+    """{log kind: records} with random flights, aircraft, timestamps and values.
+
+    Some records lack a field or their timestamp. With ordered, each log is
+    sorted by timestamp, as streaming input must be.
+    """
+    rng = random.Random(seed)
+    logs = {}
+    for kind, fields in FIELDS.items():
+        records = []
+        for _ in range(rng.randint(0, n)):
+            r = {"flight_id": rng.choice(FLIGHTS), "aircraft_id": rng.choice(["X", "Y", None]),
+                 "timestamp": f"2025-12-10T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"}
+            r.update((k, rng.choice(v)) for k, v in fields.items() if rng.random() < 0.85)
+            if rng.random() < 0.05 and not ordered:
+                del r["timestamp"]
+            records.append(r)
+        logs[kind] = sorted(records, key=lambda r: r["timestamp"]) if ordered else records
+    return logs
+
+@pytest.fixture(autouse=True)
+def alert_logs(tmp_path, monkeypatch) -> Path:
+    """Alert logs go to a temporary directory instead of logs/."""
+    path = tmp_path / "logs"
+    monkeypatch.setattr(health_monitor, "LOGS", path)
+    return path
+
+@pytest.fixture
+def cfg() -> dict:
+    return health_monitor.load_config()
+
+class _Clock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 12, 10, 12)
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, capsys):
+    """main.run over random_logs(5) in a temporary data directory.
+
+    Passenger and crew files are added for the same flights. Returns
+    run(config=None, **options) -> (console output, report text); the
+    config is airline_config.json unless a dict is given, and the report
+    clock is frozen so runs compare byte for byte.
+    """
+    data = tmp_path / "data"
+    data.mkdir()
+    rng = random.Random(5)
+    files = {log_processor.LOG_FILES[kind]: records for kind, records in random_logs(5, n=150, ordered=True).items()}
+    files["passenger_load.json"] = [
+        {"flight_id": f, "timestamp": f"2025-12-0{day}T08:00:00", "capacity": 180, "booked": rng.randint(90, 190),
+         "origin": "DEL", "destination": rng.choice(["BOM", "BLR"])} for day in range(3, 10) for f in FLIGHTS]
+    files["crew.json"] = [{"crew_id": f"C{i}", "role": rng.choice(["pilot", "cabin"]),
+                           "last_rest_end": "2025-12-09T00:00:00"} for i in range(9)]
+    for fn, records in files.items():
+        (data / fn).write_text(json.dumps(records), encoding="utf-8")
+    for module in (log_processor, crew_optimizer, incremental, binary_cache):
+        monkeypatch.setattr(module, "DATA_DIR", data)
+    monkeypatch.setattr(binary_cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(reporter, "OUTPUT", tmp_path / "reports")
+    monkeypatch.setattr(reporter, "datetime", SimpleNamespace(date=date, datetime=_Clock))
+    monkeypatch.setattr(incremental.ResultCache.__init__, "__defaults__", (tmp_path / "state.json",))
+    import main
+
+    def run(config=None, **options):
+        if config is not None:
+            path = tmp_path / "airline_config.json"
+            path.write_text(json.dumps(config), encoding="utf-8")
+            monkeypatch.setattr(health_monitor, "CONFIG_PATH", path)
+        crew_optimizer.clear_crew_assignments()
+        main.run(**options)
+        out = capsys.readouterr().out
+        report = next((tmp_path / "reports").iterdir())
+        text = report.read_text(encoding="utf-8")
+        report.unlink()
+        return out, text
+    return run
@@ -0,0 +1,18 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from run_benchmarks import compare
+
+def _run(**stages):
+    return {"data": "d", "stages": {name: {"wall_s": wall, "peak_mb": mb, "digest": digest}
+                                    for name, (wall, mb, digest) in stages.items()}}
+
+def test_compare_checks_time_memory_and_output(capsys):
+    baseline = _run(fast=(0.001, 0.5, "a"), slow=(1.0, 10.0, "b"), fat=(1.0, 10.0, "c"), same=(1.0, None, "d"))
+    current = _run(fast=(0.004, 0.9, "a"), slow=(2.0, 10.0, "b"), fat=(1.0, 20.0, "x"), same=(1.1, None, "d"))
+    assert compare(current, baseline, 1.25) == ["slow: 2.00x slower", "fat: peak memory 10.00 MB -> 20.00 MB",
+                                                "fat: output changed"]
+    assert "noise" in capsys.readouterr().out
+    assert compare(current, baseline, 1.25, memory_tolerance=3, min_wall=5) == ["fat: output changed"]
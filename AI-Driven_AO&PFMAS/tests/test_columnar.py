@@ -0,0 +1,54 @@
+import json
+import pytest
+from conftest import random_logs
+from modules.binary_cache import CachedLog, convert
+from modules.columnar import Frame, _replay, monitor_health_columnar, predict_delays_columnar
+from modules.delay_predictor import predict_delays
+from modules.health_monitor import monitor_health
+from modules.rules import compile_rules
+
+def _cached(tmp_path, logs):
+    """Frames over binary caches of the logs, sharing one vocab."""
+    vocab, frames = {}, []
+    for kind in ("engine", "weather", "altitude", "cabin"):
+        source = tmp_path / f"{kind}.json"
+        source.write_text(json.dumps(logs[kind]), encoding="utf-8")
+        frames.append(Frame(CachedLog(convert(source, tmp_path / f"{kind}-cache")), vocab))
+    return frames
+
+@pytest.mark.parametrize("seed", range(40))
+def test_columnar_matches_dict_path(seed, cfg, tmp_path):
+    logs = random_logs(seed, ordered=True)
+    engine, weather, altitude, cabin = (logs[k] for k in ("engine", "weather", "altitude", "cabin"))
+    alerts = monitor_health(engine, altitude, cabin, cfg)
+    delays = list(predict_delays(cfg, engine, weather, altitude, cabin).items())
+    assert monitor_health_columnar(engine, altitude, cabin, cfg) == alerts
+    assert list(predict_delays_columnar(cfg, engine, weather, altitude, cabin).items()) == delays
+    frames = _cached(tmp_path, logs)
+    assert monitor_health_columnar(frames[0], frames[2], frames[3], cfg) == alerts
+    assert list(predict_delays_columnar(cfg, *frames).items()) == delays
+
+def test_columnar_orders_by_utc_time(cfg):
+    # 04:30+01:00 is 03:30 UTC, so it comes between the other two readings
+    cabin = [{"flight_id": "A1", "timestamp": f"2025-12-10T{t}", "cabin_pressure": p}
+             for t, p in (("03:00:00", 7000), ("04:30:00+01:00", 7000), ("03:45:00", 7900))]
+    expected = {"A1": (25, ["Rapid cabin pressure change"])}
+    assert predict_delays(cfg, [], [], [], cabin) == expected
+    assert predict_delays_columnar(cfg, [], [], [], cabin) == expected
+
+@pytest.mark.parametrize("seed", range(40))
+def test_columnar_health_unordered_input(seed, cfg):
+    logs = random_logs(seed)
+    assert monitor_health_columnar(logs["engine"], logs["altitude"], logs["cabin"], cfg) == \
+        monitor_health(logs["engine"], logs["altitude"], logs["cabin"], cfg)
+
+@pytest.mark.parametrize("count", [1, 2, 3])
+@pytest.mark.parametrize("minutes", [1, 30, 60])
+def test_vectorized_replay_matches_rule_replay(count, minutes, cfg):
+    rule = next(r for r in compile_rules(dict(cfg, turbulence_repeat_count=count,
+                                                   turbulence_repeat_window_min=minutes)).alerts if r.window)
+    for seed in range(30):
+        records = random_logs(seed, n=80)["altitude"]
+        for i, r in enumerate(records[::7]):  # odd and clashing timestamps
+            r["timestamp"] = [None, "garbage", 5, "2025-12-10 03:10"][i % 4]
+        assert _replay(rule, records) == rule.replay(records)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+import random
+import pytest
+from modules import crew_optimizer as co
+
+NOW = datetime(2025, 12, 10, 12, tzinfo=timezone.utc)
+CFG = {"required_pilots": 3, "required_cabin_crew": 4, "crew_rest_hours": 12}
+
+@pytest.fixture(autouse=True)
+def no_bookings():
+    co.clear_crew_assignments()
+    yield
+    co.clear_crew_assignments()
+
+def _roster(seed):
+    rng = random.Random(seed)
+    flights = [f"F{i}" for i in range(rng.randint(2, 8))]
+    crew = []
+    for i in range(rng.randint(5, 30)):
+        c = {"crew_id": f"C{i}", "role": rng.choice(["pilot", "cabin", "Pilot", "engineer"]),
+             "last_rest_end": (NOW - timedelta(hours=rng.choice([1, 20, 30]))).isoformat()}
+        if rng.random() < 0.4:
+            c["assigned_flight"] = rng.choice(flights + ["X9"])
+        crew.append(c)
+    return flights, crew
+
+def _fewest_shortages(flights, crew):
+    """Brute force over every subset of flights to staff."""
+    free = {"pilot": 0, "cabin": 0}
+    pinned = {f: {"pilot": 0, "cabin": 0} for f in flights}
+    for c in crew:
+        role = c["role"].lower()
+        if role not in free or co._rest_end(c) + timedelta(hours=12) > NOW:
+            continue
+        if c.get("assigned_flight") is None:
+            free[role] += 1
+        elif c["assigned_flight"] in pinned:
+            pinned[c["assigned_flight"]][role] += 1
+    need = [(max(0, 3 - pinned[f]["pilot"]), max(0, 4 - pinned[f]["cabin"])) for f in flights]
+    most = max(len(s) for k in range(len(flights) + 1) for s in combinations(need, k)
+               if sum(p for p, _ in s) <= free["pilot"] and sum(c for _, c in s) <= free["cabin"])
+    return len(flights) - most
+
+@pytest.mark.parametrize("seed", range(300))
+def test_batch_is_optimal_and_never_worse_than_greedy(seed):
+    flights, crew = _roster(seed)
+    stats = co.compare_with_greedy(flights, crew, CFG, NOW)
+    assert stats["batch_shortages"] == _fewest_shortages(flights, crew)
+    assert stats["shortages_removed"] >= 0
+
+def test_batch_counterexample_for_contention_ordering():
+    # Deficits F0 (3,3), F1 (3,3), F2 (2,4), F3 (1,4) against 7 free pilots and 6 cabin crew:
+    # staffing the cheapest-looking F3 first leaves room for nothing else
+    booked = [("pilot", "F3"), ("pilot", "F3"), ("cabin", "F0"), ("cabin", "F1"), ("pilot", "F2")]
+    crew = [{"crew_id": f"B{i}", "role": role, "assigned_flight": f} for i, (role, f) in enumerate(booked)]
+    crew += [{"crew_id": f"P{i}", "role": "pilot"} for i in range(7)]
+    crew += [{"crew_id": f"A{i}", "role": "cabin"} for i in range(6)]
+    flights = ["F0", "F1", "F2", "F3"]
+    result = co.solve_crew_batch(flights, crew, CFG, NOW)
+    assert result["shortages"] == ["F2", "F3"]
+    for f in ("F0", "F1"):
+        roles = [c["role"] for c in result["assignments"][f]]
+        assert roles.count("pilot") == 3 and roles.count("cabin") == 4
+    used = [c["crew_id"] for crew in result["assignments"].values() for c in crew]
+    assert len(used) == len(set(used))
+    stats = co.compare_with_greedy(flights, crew, CFG, NOW, batch=result)
+    assert stats == co.compare_with_greedy(flights, crew, CFG, NOW)
+    assert stats["batch_shortages"] == 2 and stats["batch_shortages"] <= stats["greedy_shortages"]
+
+@pytest.mark.parametrize("seed", range(200))
+def test_full_deficit_shortcut_matches_knapsack(seed):
+    rng = random.Random(seed)
+    top = (rng.randint(1, 3), rng.randint(1, 4))
+    demand = {top: rng.randint(1, 400)}
+    for _ in range(rng.randint(1, 5)):
+        d = (rng.randint(0, top[0]), rng.randint(0, top[1]))
+        demand[d] = demand.get(d, 0) + rng.randint(1, 40)
+    supply = (rng.randint(0, 600), rng.randint(0, 800))
+    staffed = co._most_staffed(demand, supply)
+    assert sum(staffed.values()) == sum(co._staff_knapsack(demand, supply).values())
+    assert all(0 <= staffed[d] <= n for d, n in demand.items())
+    assert all(sum(d[r] * k for d, k in staffed.items()) <= supply[r] for r in range(2))
+
+@pytest.mark.parametrize("seed", range(150))
+def test_pool_matches_list_scan(seed):
+    rng = random.Random(seed)
+    flights, roster = _roster(seed)
+    now = datetime.now(timezone.utc)
+    for c in roster:  # rest ends relative to the wall clock assign_crew reads, far from the 12h boundary
+        c["last_rest_end"] = (now - timedelta(hours=rng.choice([1, 20, 30]))).isoformat()
+        if rng.random() < 0.1:
+            c["last_rest_end"] = rng.choice([None, "garbage"])
+    ops = [(rng.choice(["assign", "assign", "unassign", "suggest"]), rng.choice(flights), rng.randint(1, 4))
+           for _ in range(12)]
+
+    def replay(crew, assign, unassign, suggest):
+        out = []
+        for op, f, n in ops:
+            if op == "assign":
+                staffed, short = assign(f)
+                out.append((op, [c["crew_id"] for c in staffed], short))
+            elif op == "unassign":
+                unassign(f)
+            else:
+                out.append((op, [[c["crew_id"] for c in group] for group in suggest(n)]))
+        return out, [c.get("assigned_flight") for c in crew]
+
+    scan = [dict(c) for c in roster]
+    expected = replay(scan, lambda f: co.assign_crew(f, scan, CFG), lambda f: co.unassign_crew(f, scan),
+                      lambda n: co.suggest_alternate_crews(scan, n))
+    co.clear_crew_assignments()
+    indexed = [dict(c) for c in roster]
+    pool = co.CrewPool(indexed, CFG, assignments={})
+    assert replay(indexed, lambda f: pool.assign(f, now), pool.unassign, pool.suggest_alternates) == expected
@@ -0,0 +1,46 @@
+from datetime import timedelta
+import pytest
+from modules.delay_predictor import predict_delay_for_flight, predict_delays
+from modules.detectors import SwingDetector, WindowCounter, by_time, parse_ts
+from modules.health_monitor import HealthStream
+
+def _fired(counter, stamps, key="X"):
+    return [stamp for stamp in stamps if counter.add(key, parse_ts(stamp))]
+
+def test_parse_ts_treats_naive_as_utc():
+    assert parse_ts("2025-12-10T03:00:00") == parse_ts("2025-12-10T04:00:00+01:00")
+    assert parse_ts("garbage") is None and parse_ts(None) is None
+    mixed = [{"timestamp": "2025-12-10T04:30:00+01:00"}, {"timestamp": "2025-12-10T03:00:00"}, {}]
+    assert by_time(mixed) == [mixed[1], mixed[0], mixed[2]]
+
+def test_mixed_timezones_in_one_flight(cfg):
+    cabin = [{"flight_id": "A1", "timestamp": "2025-12-10T03:00:00", "cabin_pressure": 7000},
+             {"flight_id": "A1", "timestamp": "2025-12-10T03:30:00+00:00", "cabin_pressure": 7900}]
+    assert predict_delay_for_flight("A1", [], [], [], cfg, cabin)[0] > 0
+
+@pytest.mark.parametrize("count, stamps, fired", [
+    (1, ["01:00", "01:30", "05:00", "09:00", "09:10"], ["01:00", "05:00", "09:00"]),
+    (1, ["01:00", "01:50", "02:40", "03:30"], ["01:00"]),  # never a gap longer than the window
+    (2, ["01:00", "01:30", "01:45", "05:00", "05:10"], ["01:30", "05:10"]),
+])
+def test_window_counter_rearms(count, stamps, fired):
+    stamps = [f"2025-12-10T{s}:00" for s in stamps]
+    assert _fired(WindowCounter(count, timedelta(minutes=60)), stamps) == [f"2025-12-10T{s}:00" for s in fired]
+
+def test_late_events_are_counted():
+    counter = WindowCounter(2, timedelta(minutes=60))
+    _fired(counter, ["2025-12-10T02:00:00", "2025-12-10T01:00:00", "2025-12-10T02:10:00"])
+    assert counter.late == 1
+    swing = SwingDetector(100)
+    for stamp, value in (("02:00", 7000), ("01:00", 9000), ("02:30", 7050)):
+        swing.update("A1", parse_ts(f"2025-12-10T{stamp}:00"), value)
+    assert swing.late == 1
+
+def test_stream_reports_late_records(cfg, capsys):
+    stream = HealthStream(cfg)
+    for stamp in ("02:00", "01:00", "03:00"):
+        stream.feed("altitude", {"flight_id": "A1", "timestamp": f"2025-12-10T{stamp}:00", "turbulence": 9})
+    assert stream.late == 1
+    cabin = [{"flight_id": "A1", "timestamp": f"2025-12-10T{s}:00", "cabin_pressure": 7000} for s in ("02:00", "01:00")]
+    predict_delays(cfg, [], [], [], cabin)
+    assert "skipped 1 out-of-order" in capsys.readouterr().out
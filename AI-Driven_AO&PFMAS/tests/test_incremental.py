@@ -0,0 +1,39 @@
+import json
+import os
+import pytest
+from conftest import random_logs
+from modules import incremental
+from modules.incremental import ResultCache
+from modules.log_processor import LOG_FILES, TelemetryStore
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "DATA_DIR", tmp_path)
+    return tmp_path
+
+def _save(data_dir, logs):
+    for kind, fn in LOG_FILES.items():
+        (data_dir / fn).write_text(json.dumps(logs.get(kind, [])), encoding="utf-8")
+    return TelemetryStore({kind: logs.get(kind, []) for kind in LOG_FILES})
+
+def _run(state, store, cfg):
+    cache = ResultCache(state)
+    results, stale = cache.evaluate(store, cfg, lambda flights: [{"flight": f} for f in flights])
+    cache.save()
+    assert [r["flight"] for r in results] == store.flights()
+    return stale
+
+def test_only_changed_flights_are_reevaluated(data_dir, tmp_path, cfg):
+    state, logs = tmp_path / "state.json", random_logs(3)
+    store = _save(data_dir, logs)
+    assert _run(state, store, cfg) == store.flights()
+    assert _run(state, store, cfg) == []
+
+    path = data_dir / LOG_FILES["cabin"]
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))  # touched, not changed
+    assert _run(state, store, cfg) == []
+
+    logs["engine"].append({"flight_id": "B2", "timestamp": "2025-12-11T00:00:00", "vibration": 9})
+    assert _run(state, _save(data_dir, logs), cfg) == ["B2"]
+
+    assert _run(state, _save(data_dir, logs), dict(cfg, engine_vibration_threshold=1)) == store.flights()
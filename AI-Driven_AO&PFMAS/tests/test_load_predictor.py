@@ -0,0 +1,31 @@
+from datetime import datetime
+import random
+from conftest import FLIGHTS
+from modules.load_predictor import LoadForecaster, predict_load
+
+def test_predictions_match_predict_load_after_every_update():
+    rng = random.Random(11)
+    forecaster, history = LoadForecaster(), {f: [] for f in FLIGHTS}
+    for day in range(200):
+        f = rng.choice(FLIGHTS)
+        r = {"flight_id": f, "timestamp": f"2025-{1 + day % 12:02d}-{1 + day % 28:02d}T08:00:00"}
+        r.update((k, rng.choice(v)) for k, v in (("booked", [0, 40, 95, 181]), ("checked_in", [10, 60, 89]),
+                                                 ("capacity", [None, 90, 180])) if rng.random() < 0.9)
+        forecaster.update(r)
+        history[f].append(r)
+        expected = [predict_load(g, history.get(g)) for g in FLIGHTS + ["Z9"]]
+        assert [forecaster.predict(g) for g in FLIGHTS + ["Z9"]] == expected
+        assert forecaster.predict_many(FLIGHTS + ["Z9"]) == expected
+
+def test_forecast_tracks_ewma_weekday_and_route():
+    records = [("A1", "2025-12-08", 100), ("A1", "2025-12-09", 150), ("B2", "2025-12-10", 60), ("A1", "2025-12-15", 140)]
+    forecaster = LoadForecaster.from_records(
+        ({"flight_id": f, "timestamp": f"{day}T08:00:00", "booked": booked, "origin": "DEL", "destination": "BOM"}
+         for f, day, booked in records), alpha=0.5)
+    monday = datetime(2025, 12, 22)
+    assert forecaster.forecast("A1", monday) == {"flight_id": "A1", "mean": 130.0, "ewma": 132.5,
+                                                  "day_of_week": 120.0, "route": 112.5}
+    assert forecaster.forecast("A1", datetime(2025, 12, 24))["day_of_week"] is None  # no Wednesday history
+    assert forecaster.forecast("B2")["day_of_week"] is None
+    assert forecaster.forecast("Z9", monday) == {"flight_id": "Z9", "mean": None, "ewma": None,
+                                                  "day_of_week": None, "route": None}
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import random
+import pytest
+from conftest import FLIGHTS, random_logs
+from modules import log_processor
+from modules.log_processor import TelemetryStore, _iter_array, cache_stats, clear_cache, io_stats, load_cached
+
+def _stream(text):
+    f = io.StringIO(text)
+    f.read(1)  # iter_json consumes the opening "[" before handing over
+    return f
+
+def _records(n, seed=1):
+    rng = random.Random(seed)
+    return [{"flight_id": f"F{i}", "s": "xé\"y" * rng.randint(0, 3),
+             "v": rng.choice([1, -2.5e3, True, None, False, 0.25, 12345]),
+             "l": [rng.random(), "a,b]"], "n": {"d": -1}} for i in range(n)]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16, 1000])
+def test_iter_array_across_chunk_boundaries(chunk_size):
+    recs = _records(40)
+    assert list(_iter_array(_stream(json.dumps(recs)), chunk_size)) == recs
+
+def test_iter_array_fails_fast_on_malformed_element():
+    text = json.dumps(_records(40))
+    f = _stream(text[:300] + "}}" + text[300:] + " " * 10**6)
+    with pytest.raises(json.JSONDecodeError):
+        list(_iter_array(f, 64))
+    assert f.tell() < 1000  # did not buffer the rest of the file first
+
+def test_iter_array_truncated_file_raises():
+    text = json.dumps(_records(3))
+    with pytest.raises(json.JSONDecodeError):
+        list(_iter_array(_stream(text[:-20]), 16))
+
+def test_load_cached_revalidates_on_mtime_and_size(tmp_path):
+    path = tmp_path / "engine_logs.json"
+    path.write_text(json.dumps(_records(3)), encoding="utf-8")
+    clear_cache()
+    read = io_stats()["bytes_read"]
+    first = load_cached(path)
+    assert load_cached(path) is first and first == _records(3)
+    assert cache_stats() == {"hits": 1, "misses": 1, "entries": 1}
+    assert io_stats()["bytes_read"] - read == path.stat().st_size  # the hit read nothing
+
+    st = path.stat()
+    path.write_text(json.dumps(_records(4)), encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))  # same mtime, new size
+    assert load_cached(path) == _records(4)
+    st = path.stat()
+    path.write_text(json.dumps(_records(4, seed=2)).ljust(st.st_size), encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))  # same size, new mtime
+    assert path.stat().st_size == st.st_size and load_cached(path) == _records(4, seed=2)
+    assert cache_stats() == {"hits": 1, "misses": 3, "entries": 1}
+
+    assert load_cached(tmp_path / "missing.json", []) == []
+    assert cache_stats()["misses"] == 3  # a missing file is neither
+    clear_cache()
+    assert cache_stats() == {"hits": 0, "misses": 0, "entries": 0}
+
+def test_telemetry_store_matches_full_scans(tmp_path, monkeypatch):
+    logs = random_logs(7, n=200)
+    logs["passenger"] = [{"flight_id": "E5", "booked": 120}, {"booked": 80}]  # E5 only flies in the passenger file
+    logs["cabin"].append({"flight_id": "F6"})  # cabin does not feed flight discovery
+    for kind, records in logs.items():
+        (tmp_path / log_processor.LOG_FILES[kind]).write_text(json.dumps(records), encoding="utf-8")
+    monkeypatch.setattr(log_processor, "DATA_DIR", tmp_path)
+    clear_cache()
+    store = TelemetryStore.load()
+    assert store.flights() == log_processor.get_all_flights() == FLIGHTS + ["E5"]
+    for kind, records in logs.items():
+        assert store.all(kind) == records
+        for f in FLIGHTS + ["E5", "F6", "Z9"]:
+            assert store.for_flight(kind, f) == [r for r in records if r.get("flight_id") == f]
+        for a in ("X", "Y"):
+            assert store.for_aircraft(kind, a) == [r for r in records if r.get("aircraft_id") == a]
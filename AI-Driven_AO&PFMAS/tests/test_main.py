@@ -0,0 +1,22 @@
+import re
+
+def test_empty_config_uses_built_in_rules(pipeline):
+    _, shipped = pipeline()
+    out, report = pipeline(config={})
+    # Same thresholds as the shipped config; only the airport graph for diversions is missing
+    before = lambda text: text.split("DIVERSION RECOMMENDATIONS:")[0]
+    assert before(report) == before(shipped)
+    assert "CRITICAL ALERTS" in report and "PREDICTED DELAYS" in report and "Report written to" in out
+
+def test_stream_mode_matches_in_memory_run(pipeline):
+    _, loaded = pipeline()
+    out, streamed = pipeline(stream=True)
+    # Streamed health alerts come out in arrival order instead of rule order
+    unnumbered = lambda text: sorted(re.sub(r"^\d+\. ", "", line) for line in text.splitlines())
+    assert unnumbered(streamed) == unnumbered(loaded)
+    assert "DIVERSION RECOMMENDATIONS:" in streamed and "out-of-order" not in out
+
+def test_worker_pool_output_is_byte_identical(pipeline):
+    serial = pipeline(workers=1)
+    assert pipeline(workers=3) == serial
+    assert "PREDICTED DELAYS" in serial[1]
@@ -0,0 +1,48 @@
+import json
+from modules.log_processor import clear_cache, load_cached
+from modules.metrics import Metrics
+
+def _run(tmp_path, **options):
+    path = tmp_path / "engine_logs.json"
+    path.write_text(json.dumps([{"flight_id": "A1"}] * 3), encoding="utf-8")
+    clear_cache()
+    metrics = Metrics(**options)
+    with metrics.stage("load") as s:
+        s.count(len(load_cached(path)))
+    with metrics.stage("load") as s:  # re-entering accumulates
+        s.count(len(load_cached(path)))
+    with metrics.stage("report"):
+        pass
+    return metrics, path.stat().st_size
+
+def test_json_output(tmp_path):
+    metrics, size = _run(tmp_path)
+    metrics.write(tmp_path / "out" / "metrics.json")
+    data = json.loads((tmp_path / "out" / "metrics.json").read_text(encoding="utf-8"))
+    assert list(data["stages"]) == ["load", "report"] and data["cache_hit_rate"] == 0.5
+    load = data["stages"]["load"]
+    assert (load["calls"], load["records"], load["bytes_read"], load["cache_hits"], load["cache_misses"]) == (2, 6, size, 1, 1)
+    assert load["profile"] is None and data["wall_s"] >= load["wall_s"] > 0
+
+def test_prometheus_output(tmp_path):
+    metrics, size = _run(tmp_path)
+    metrics.write(tmp_path / "metrics.prom")
+    lines = (tmp_path / "metrics.prom").read_text(encoding="utf-8").splitlines()
+    samples = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+    assert samples['aopfmas_stage_records{stage="load"}'] == "6"
+    assert samples['aopfmas_stage_bytes_read{stage="load"}'] == str(size)
+    assert samples['aopfmas_stage_cache_misses{stage="report"}'] == "0"
+    assert samples["aopfmas_cache_hit_ratio"] == "0.5" and float(samples["aopfmas_run_wall_seconds"]) > 0
+    declared = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert sorted(declared) == sorted({key.split("{")[0] for key in samples})  # each metric declared once
+
+def test_disabled_metrics_record_nothing(tmp_path):
+    metrics, _ = _run(tmp_path, enabled=False)
+    assert metrics.stages == {} and metrics.as_dict()["cache_hit_rate"] is None
+    assert "cache_hit_ratio" not in metrics.to_prometheus()
+
+def test_profiled_stage_dumps_stats(tmp_path):
+    metrics, _ = _run(tmp_path, profile=["report"], profile_dir=tmp_path / "prof")
+    assert metrics.stages["load"].profile is None
+    assert metrics.stages["report"].profile == str(tmp_path / "prof" / "report.prof")
+    assert (tmp_path / "prof" / "report.prof").stat().st_size > 0
@@ -0,0 +1,66 @@
+import gzip
+import os
+import time
+import pytest
+from modules import reporter
+from modules.rotation import RotatingWriter, rotation_settings
+
+def _contents(path):
+    return {p.name: p.read_text(encoding="utf-8") for p in sorted(path.iterdir())}
+
+@pytest.mark.parametrize("max_bytes", [0, 1, 25, 64, 1000])
+def test_write_lines_rotates_like_single_writes(tmp_path, max_bytes):
+    lines = [f"alert {i} " + "x" * (i % 13) for i in range(40)]
+    settings = rotation_settings({"output_rotation": {"max_bytes": max_bytes, "daily": False}})
+    for name, batched in (("one", False), ("many", True)):
+        (tmp_path / name).mkdir()
+        with RotatingWriter(tmp_path / name / "alerts.log", settings) as w:
+            for part in (lines[:7], lines[7:]):
+                if batched:
+                    w.write_lines(part)
+                else:
+                    for line in part:
+                        w.write(line + "\n")
+    assert _contents(tmp_path / "one") == _contents(tmp_path / "many")
+
+def test_write_block_never_splits(tmp_path):
+    settings = rotation_settings({"output_rotation": {"max_bytes": 10, "daily": False}})
+    with RotatingWriter(tmp_path / "report.txt", settings) as w:
+        w.write_block(iter(["first block", "is long"]), separate=True)
+        w.write_block(["second"], separate=True)
+    assert _contents(tmp_path) == {"report.1.txt": "first block\nis long\n", "report.txt": "second\n"}
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporter, "OUTPUT", tmp_path)
+    return tmp_path
+
+def _old_report(path, name, days_ago):
+    p = path / f"aviation_report_{name}.txt"
+    p.write_text(f"{name}\n", encoding="utf-8")
+    stamp = time.time() - days_ago * 86400
+    os.utime(p, (stamp, stamp))
+
+def test_report_appends_on_the_same_day(reports):
+    reporter.write_report("2025-12-10", "one\ntwo")
+    path = reporter.write_report("2025-12-10", iter(["three"]))
+    assert _contents(reports) == {"aviation_report_2025-12-10.txt": "one\ntwo\n\nthree\n"}
+    assert path == str(reports / "aviation_report_2025-12-10.txt")
+
+def test_report_gzips_earlier_days(reports):
+    _old_report(reports, "2025-12-09", 1)
+    reporter.write_report("2025-12-10", "today", {"output_rotation": {"compress": True}})
+    assert sorted(p.name for p in reports.iterdir()) == ["aviation_report_2025-12-09.txt.gz",
+                                                         "aviation_report_2025-12-10.txt"]
+    assert gzip.decompress((reports / "aviation_report_2025-12-09.txt.gz").read_bytes()) == b"2025-12-09\n"
+
+@pytest.mark.parametrize("policy, kept", [
+    ({"keep": 2, "keep_days": 0}, ["2025-12-08", "2025-12-09", "2025-12-10"]),
+    ({"keep": 0, "keep_days": 3}, ["2025-12-06", "2025-12-08", "2025-12-09", "2025-12-10"]),
+    ({"keep": 0, "keep_days": 0}, ["2025-12-01", "2025-12-06", "2025-12-08", "2025-12-09", "2025-12-10"]),
+])
+def test_report_retention(reports, policy, kept):
+    for name, days_ago in (("2025-12-01", 9), ("2025-12-06", 2.5), ("2025-12-08", 1.5), ("2025-12-09", 0.5)):
+        _old_report(reports, name, days_ago)
+    reporter.write_report("2025-12-10", "today", {"output_rotation": policy})
+    assert sorted(p.name for p in reports.iterdir()) == [f"aviation_report_{d}.txt" for d in kept]
@@ -0,0 +1,18 @@
+from collections import Counter
+from modules.health_monitor import load_config
+from modules.routing import RoutingTable
+
+CFG = dict(load_config(), airports=["DEL", "BOM", "JAI", "BLR"], alternate_airports={"DEL": ["JAI", "BOM"]}, max_alternates=3)
+STORM = {"flight_id": "A1", "destination": "DEL", "thunderstorm": True}
+
+def test_unpriced_edges_cost_hops():
+    table = RoutingTable(CFG, Counter({("BOM", "BLR"): 1}))
+    assert table.ranked_alternates("DEL") == [("JAI", 1), ("BOM", 1), ("BLR", 2)]
+    assert table.diversion(STORM)["extra_time_min"] == 30 + 10 * 3
+
+def test_partly_priced_graph_costs_minutes_throughout():
+    table = RoutingTable(dict(CFG, route_minutes={"DEL-BOM": 110}), Counter({("BOM", "BLR"): 1}))
+    assert table.ranked_alternates("DEL") == [("JAI", 60), ("BOM", 110), ("BLR", 170)]
+    assert table.diversion(STORM)["extra_time_min"] == 30 + 60
+    table = RoutingTable(dict(CFG, route_minutes={"DEL-BOM": 110}, default_route_minutes=200))
+    assert table.ranked_alternates("DEL") == [("BOM", 110), ("JAI", 200)]
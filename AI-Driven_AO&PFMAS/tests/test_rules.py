@@ -0,0 +1,187 @@
+from datetime import timedelta
+import pytest
+from conftest import FLIGHTS, random_logs
+from modules.delay_predictor import predict_delay_for_flight, predict_delays
+from modules.detectors import SwingDetector, WindowCounter, by_time, parse_ts, record_key
+from modules.health_monitor import HealthStream, monitor_health, monitor_health_stream
+from modules.routing import needs_diversion, weather_risk
+from modules.rules import _formatter, compile_rules
+
+@pytest.mark.parametrize("seed", range(40))
+def test_per_flight_delays_match_one_pass(seed, cfg):
+    logs = random_logs(seed, ordered=True)
+    engine, weather, altitude, cabin = (logs[k] for k in ("engine", "weather", "altitude", "cabin"))
+    batch = predict_delays(cfg, engine, weather, altitude, cabin)
+    for _ in range(2):  # the shared per-flight checkers start clean on every call
+        for f in FLIGHTS:
+            assert predict_delay_for_flight(f, engine, weather, altitude, cfg, cabin) == batch.get(f, (0, []))
+
+def _spec(**spec):
+    return dict({"log": "engine", "when": [{"field": "vibration", "op": ">", "threshold": 5}],
+                 "delay": {"reason": "Vibration", "minutes": 10}}, **spec)
+
+@pytest.mark.parametrize("rules, error", [
+    ({"engine": []}, "must be a list"),
+    (["engine"], "expected an object"),
+    ([_spec(log="fuel")], "unknown log 'fuel'"),
+    ([_spec(log=None)], "unknown log None"),
+    ([_spec(log="weather", alert={"name": "WIND"})], "not raised on the weather log"),
+    ([_spec(window={"count": 2, "minutes": 5})], "window needs an alert"),
+    ([_spec(groups="diversion")], "list of names"),
+    ([_spec(delay=None)], "no alert or delay"),
+    ([_spec(when=[{"field": "vibration", "op": "~"}])], "unsupported op"),
+    ([_spec(when=[{"field": "vibration", "threshold": "no_such_key"}])], "unknown config key"),
+])
+def test_invalid_rules_are_rejected(rules, error, cfg):
+    bad = dict(cfg, rules=rules)
+    with pytest.raises(ValueError, match=error):
+        compile_rules(bad)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_weather_rules_drive_routing(seed, cfg):
+    for w in random_logs(seed)["weather"]:
+        assert weather_risk(w, cfg) == bool(w.get("crosswind", 0) > 40 or w.get("thunderstorm")
+                                            or w.get("visibility", 999999) < 1500)
+        assert needs_diversion(w, cfg) == bool(w.get("thunderstorm") or w.get("visibility", 999999) < 1500)
+
+# The health and delay rules as they were hand-coded before the rule engine
+def _msg(r, name, extra):
+    return f"{r.get('timestamp')} {r.get('flight_id')} {name} {extra}"
+
+def _line(r, name, extra):
+    return f"timestamp: {r.get('timestamp')}, flight: {r.get('flight_id')}, alert: {name}, {extra}"
+
+def _fuel(r):
+    dev = r.get("expected_thrust", 100) - r.get("engine_thrust", 100)
+    return (_msg(r, "ABNORMAL_FUEL_BURN", f"fuel_burn={r.get('fuel_burn')} thrust_deviation={dev:.1f}%"),
+            _line(r, "ABNORMAL_FUEL_BURN", f"fuel_burn: {r.get('fuel_burn')}, thrust_deviation: {dev:.1f}%"), True)
+
+def _turbulent(r):
+    return r.get("turbulence", 0) > 4.0
+
+LEGACY_ALERTS = [  # (log, predicate, alert) in output order; None marks REPEATED_TURBULENCE
+    ("engine", lambda r: r.get("vibration", 0) > 5.0,
+     lambda r: (_msg(r, "HIGH_VIBRATION", f"vibration={r.get('vibration')}"),
+                _line(r, "HIGH_VIBRATION", f"vibration: {r.get('vibration')}, threshold: 5.0"), True)),
+    ("altitude", lambda r: r.get("altitude", 0) < 1500 and _turbulent(r),
+     lambda r: (_msg(r, "RAPID_ALTITUDE_FLUCT", f"altitude={r.get('altitude')} turbulence={r.get('turbulence')}"),
+                _line(r, "RAPID_ALTITUDE_FLUCT", f"altitude: {r.get('altitude')}m, turbulence: {r.get('turbulence')}"), True)),
+    ("altitude", _turbulent, None),
+    ("engine", lambda r: r.get("engine_thrust", 100) < r.get("expected_thrust", 100) * 0.85 and r.get("fuel_burn", 0) > 2600,
+     _fuel),
+    ("cabin", lambda r: r.get("cabin_temperature", 0) > 30,
+     lambda r: (_msg(r, "HIGH_CABIN_TEMP", f"temperature={r.get('cabin_temperature')}"),
+                _line(r, "HIGH_CABIN_TEMP", f"temperature: {r.get('cabin_temperature')}C, limit: 30C"), False)),
+    ("cabin", lambda r: r.get("cabin_altitude", 0) > 8000 or r.get("pressure_rate_change", 0) > 500,
+     lambda r: (_msg(r, "HIGH_CABIN_PRESSURE", f"cabin_altitude={r.get('cabin_altitude', 0)} pressure_rate={r.get('pressure_rate_change', 0)}"),
+                _line(r, "HIGH_CABIN_PRESSURE", f"cabin_altitude: {r.get('cabin_altitude', 0)}ft, pressure_rate: {r.get('pressure_rate_change', 0)}ft/min"), False)),
+]
+
+def _repeated(r, turbulence):
+    cnt = turbulence.add(record_key(r), parse_ts(r.get("timestamp")))
+    return cnt and [(_msg(r, "REPEATED_TURBULENCE", f"count={cnt}"), _line(r, "REPEATED_TURBULENCE", f"occurrences: {cnt}"), False)]
+
+def _legacy_stream(kind, r, turbulence):
+    found = []
+    for log, holds, alert in LEGACY_ALERTS:
+        if log == kind and holds(r):
+            found += [alert(r)] if alert else _repeated(r, turbulence) or []
+    return found
+
+def _legacy_health(logs):
+    found = []
+    for log, holds, alert in LEGACY_ALERTS:
+        matched = [r for r in logs[log] if holds(r)]
+        if alert:
+            found += map(alert, matched)
+        else:
+            turbulence = WindowCounter(2, timedelta(minutes=60))
+            found += [a for r in by_time(matched) for a in _repeated(r, turbulence) or []]
+    return found
+
+def _legacy_delays(flight_id, logs):
+    hits, swings = [], SwingDetector(300)
+    for w in logs["weather"]:
+        hits += [h for h, hit in ((("High crosswind", 30), w.get("crosswind", 0) > 40),
+                                  (("Thunderstorm reported", 60), w.get("thunderstorm", False)),
+                                  (("Low visibility", 45), w.get("visibility", 999999) < 1500)) if hit]
+    for e in logs["engine"]:
+        ref = e.get("expected_thrust")
+        hits += [h for h, hit in ((("Engine thrust deviation", 50), ref and abs(e.get("engine_thrust", 0) - ref) / ref * 100 > 20),
+                                  (("High engine vibration", 40), e.get("vibration", 0) > 5.0)) if hit]
+    if any(a.get("turbulence", 0) >= 4.0 for a in logs["altitude"]):
+        hits.append(("Turbulence advisory", 15))
+    for c in logs["cabin"]:
+        swing = swings.update(flight_id, parse_ts(c.get("timestamp")), c.get("cabin_pressure", 0))
+        hits += [h for h, hit in ((("Sudden cabin pressure drop", 35), c.get("pressure_rate_change", 0) > 500),
+                                  (("Rapid cabin pressure change", 25), swing)) if hit]
+    return sum(m for _, m in hits), [reason for reason, _ in hits]
+
+@pytest.mark.parametrize("seed", range(150))
+def test_compiled_rules_match_hand_coded_rules(seed, cfg, alert_logs):
+    logs = random_logs(seed, ordered=seed % 2 == 0)
+    expected = _legacy_health(logs)
+    assert monitor_health(logs["engine"], logs["altitude"], logs["cabin"], cfg) == [a for a, _, _ in expected]
+    if expected:
+        logged = (alert_logs / "aircraft_health_alerts.log").read_text(encoding="utf-8").splitlines()
+        assert logged[2:] == [line for _, line, _ in expected]
+
+    stream, turbulence = HealthStream(cfg), WindowCounter(2, timedelta(minutes=60))
+    for kind in ("engine", "altitude", "cabin"):
+        for r in logs[kind]:
+            assert stream.feed(kind, r) == _legacy_stream(kind, r, turbulence)
+
+    for f in FLIGHTS:
+        per_flight = {k: [r for r in records if r.get("flight_id") == f] for k, records in logs.items()}
+        per_flight["cabin"] = by_time(per_flight["cabin"])
+        assert predict_delay_for_flight(f, logs["engine"], logs["weather"], logs["altitude"], cfg, logs["cabin"]) \
+            == _legacy_delays(f, per_flight)
+
+def test_streamed_health_writes_batch_alerts_as_they_fire(cfg, alert_logs, capsys):
+    logs = random_logs(3, n=400, ordered=True)
+    health = alert_logs / "aircraft_health_alerts.log"
+    batch = monitor_health(logs["engine"], logs["altitude"], logs["cabin"], cfg)
+    batch_lines = health.read_text(encoding="utf-8").splitlines()[2:]
+    health.unlink()
+    streamed = monitor_health_stream(iter(logs["engine"]), iter(logs["altitude"]), iter(logs["cabin"]), cfg)
+    assert any("REPEATED_TURBULENCE" in a for a in batch)
+    assert sorted(streamed) == sorted(batch) and streamed != batch  # arrival order, not rule order
+    assert sorted(health.read_text(encoding="utf-8").splitlines()[2:]) == sorted(batch_lines)
+    assert "out-of-order" not in capsys.readouterr().out
+    monitor_health_stream([], logs["altitude"][::-1], [], cfg)
+    assert "out-of-order" in capsys.readouterr().out
+
+@pytest.mark.parametrize("template, record, text", [
+    ("{flight_id} at {timestamp}", {"flight_id": "A1", "timestamp": "t0"}, "A1 at t0"),
+    ("{flight_id} {vibration}", {"flight_id": "A1"}, "A1 None"),  # missing field without a default
+    ("{engine_thrust:.1f}% {fuel_burn!r:>6}", {"engine_thrust": 85, "fuel_burn": "x"}, "85.0%    'x'"),
+    ("{expected_thrust - engine_thrust:.1f}", {"engine_thrust": 70}, "30.0"),  # defaults fill expected_thrust
+    ("{-altitude * 2 + 1} / {altitude / 4}", {"altitude": 10}, "-19 / 2.5"),
+    ("{{literal}} 'quoted' \"both\" {count}/{threshold}", {}, "{literal} 'quoted' \"both\" 3/5.5"),
+])
+def test_formatter_renders_templates(template, record, text):
+    fmt = _formatter([template, "{flight_id}"], {"expected_thrust": 100}, "T", threshold=5.5, critical=True)
+    assert fmt(record, 3) == (text, str(record.get("flight_id")), True)
+
+def test_formatter_lists_fields_it_reads():
+    fmt = _formatter(["{a} {b - c:.1f} {count}", "{a} {threshold}"], {}, "T")
+    assert fmt.fields == ("a", "b", "c")
+
+@pytest.mark.parametrize("template", ["{f(x)}", "{a.b}", "{a[0]}", "{a:{width}}", "{a ** 2}", "{'x'}"])
+def test_formatter_rejects_other_expressions(template):
+    with pytest.raises(ValueError):
+        _formatter([template], {}, "T")
+
+def test_checker_keeps_state_per_call_and_resets(cfg):
+    rules = compile_rules(cfg)
+    cabin = [{"flight_id": "A1", "timestamp": f"2025-12-10T0{h}:00:00", "cabin_pressure": p}
+             for h, p in ((1, 7000), (2, 7500), (3, 7550))]
+    one, other = rules.delay_check("cabin"), rules.delay_check("cabin")
+    assert [one(r) for r in cabin] == [(), (("Rapid cabin pressure change", 25),), ()]
+    assert other(cabin[2]) == ()  # fresh factory state: no previous reading
+    assert len(one.detectors) == 1 and one.detectors[0].last
+    one.reset()
+    assert not one.detectors[0].last and one(cabin[1]) == ()
+    altitude = rules.delay_check("altitude")
+    hits = [altitude({"flight_id": f, "turbulence": 5}) for f in ("A1", "A1", "B2")]
+    assert hits == [(("Turbulence advisory", 15),), (), (("Turbulence advisory", 15),)]  # once per flight
@@ -0,0 +1,39 @@
+import asyncio
+import json
+import pytest
+from modules.service import MonitoringService
+
+def _line(**record):
+    return json.dumps(dict({"flight_id": "A1", "timestamp": "2025-12-10T01:00:00"}, **record)) + "\n"
+
+async def _until(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_daemon_alerts_on_appended_records_and_shuts_down(tmp_path, alert_logs, cfg):
+    engine = tmp_path / "engine_logs.json"
+    engine.write_text(_line(vibration=9.0), encoding="utf-8")  # already on disk: skipped
+    service = MonitoringService(cfg, data_dir=tmp_path, poll_interval=0.01, dashboard_interval=3600)
+
+    async def scenario():
+        task = asyncio.create_task(service.serve())
+        await asyncio.sleep(0.05)
+        with engine.open("a", encoding="utf-8") as f:
+            f.write(_line(vibration=2.0) + _line(vibration=7.5)[:20])  # the last line is still being written
+        await _until(lambda: service.records == 1)
+        assert service.alerts == 0
+        with engine.open("a", encoding="utf-8") as f:
+            f.write(_line(vibration=7.5)[20:])
+        await _until(lambda: service.alerts == 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert service.records == 2 and list(service.recent) == ["2025-12-10T01:00:00 A1 HIGH_VIBRATION vibration=7.5"]
+    assert service.appender.health.file is None and service.appender.critical.file is None
+    logged = (alert_logs / "aircraft_health_alerts.log").read_text(encoding="utf-8").splitlines()
+    assert logged[2:] == ["timestamp: 2025-12-10T01:00:00, flight: A1, alert: HIGH_VIBRATION, vibration: 7.5, threshold: 5.0"]